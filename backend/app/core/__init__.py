@@ -1,4 +1,4 @@
 # Core package
-from .config import settings
+from .config import get_settings, settings
 
-__all__ = ["settings"]
+__all__ = ["get_settings", "settings"]
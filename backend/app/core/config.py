@@ -1,69 +1,261 @@
+import json
+import logging
 import os
+import tempfile
+import threading
+import time
+from functools import cached_property, lru_cache
+from pathlib import Path
 from dotenv import load_dotenv
-from typing import List, Optional
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+from typing import Annotated, Any, Dict, FrozenSet, List, Optional, Tuple
+
+# backend/.env, resolved directly instead of letting python-dotenv walk the
+# call stack and parent directories to discover it.
+_ENV_FILE = Path(__file__).resolve().parents[2] / ".env"
+
+
+@lru_cache(maxsize=1)
+def _load_env_once() -> None:
+    """Parse .env at most once per process.
+
+    A process manager that has already merged .env into the environment can set
+    DOTENV_LOADED=1 to skip the parse. The app only reads the sentinel and never
+    sets it, so --reload / worker children still pick up edits to .env.
+    """
+    if os.environ.get("DOTENV_LOADED") == "1":
+        return
+    # Hosted deploys inject real env vars and ship no .env; skip the parser entirely
+    if _ENV_FILE.is_file():
+        load_dotenv(_ENV_FILE, override=False)
+
 
 # Load environment variables
-load_dotenv()
+_load_env_once()
+
+# Last known provider reachability, persisted so restarts can serve it immediately.
+# Kept under PROVIDER_STATUS_DIR (default: the system temp dir), never in the package.
+_PROVIDER_STATUS_FILENAME = "mindforge_provider_status.json"
+_PROVIDER_STATUS_MAX_AGE = 24 * 3600  # seconds
+_PROVIDER_PROBE_URLS = {
+    "gemini": "https://generativelanguage.googleapis.com",
+    "firebase": "https://firestore.googleapis.com",
+}
+_provider_status: Dict[str, Any] = {}
+_provider_status_lock = threading.Lock()
+
+
+def _probe_providers(configured: Dict[str, bool], status_file: Path) -> None:
+    """Check reachability of configured providers and persist the result.
+
+    Runs on a daemon thread; failures only mark a provider as not ok. The file
+    is replaced atomically, so workers probing at once never read a partial one.
+    """
+    import requests
+
+    status: Dict[str, Any] = {}
+    for name, url in _PROVIDER_PROBE_URLS.items():
+        ok = False
+        if configured.get(name):
+            try:
+                requests.head(url, timeout=5)
+                ok = True
+            except Exception:  # noqa: BLE001
+                ok = False
+        status[f"{name}_ok"] = ok
+    status["checked_at"] = time.time()
+    with _provider_status_lock:
+        _provider_status.clear()
+        _provider_status.update(status)
+    try:
+        status_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=status_file.parent, prefix=".provider_status.")
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(status))
+        os.replace(tmp, status_file)
+    except OSError:
+        pass
+
+
+class Settings(BaseSettings):
+    """Application settings and configuration
+
+    Values are read from the process environment once, when the instance is
+    created, and coerced by pydantic-core. The instance is frozen afterwards.
+    """
+
+    model_config = SettingsConfigDict(
+        frozen=True,
+        case_sensitive=True,
+        # Treat `KEY=` lines from .env.example copies as unset rather than invalid
+        env_ignore_empty=True,
+        extra="ignore",
+    )
 
-class Settings:
-    """Application settings and configuration"""
-    
     # API Settings
     API_TITLE: str = "MindForge API"
     API_DESCRIPTION: str = "MindForge – AI-tempered innovation evaluation platform for RVCE coding events"
     API_VERSION: str = "1.0.0"
-    
+
+    # Event Settings
+    CURRENT_ROUND: str = "1"
+
     # Server Settings
     HOST: str = "0.0.0.0"
     PORT: int = 8000
-    DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
-    
+    DEBUG: bool = False
+
     # CORS Settings
-    CORS_ORIGINS: List[str] = [
-        o.strip() for o in os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",") if o.strip()
-    ]
+    CORS_ORIGINS: Annotated[Tuple[str, ...], NoDecode] = ("http://localhost:5173",)
     # Optional: allow regex for preview domains (e.g., Vercel)
-    CORS_ALLOW_ORIGIN_REGEX: Optional[str] = os.getenv("CORS_ALLOW_ORIGIN_REGEX")
-    
+    CORS_ALLOW_ORIGIN_REGEX: Optional[str] = None
+
     # External API Keys
-    GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    GEMINI_API_KEY: str = ""
     # Optional: multiple keys for bursty events (comma-separated)
-    GEMINI_API_KEYS: List[str] = [
-        k.strip() for k in os.getenv("GEMINI_API_KEYS", "").split(",") if k.strip()
-    ]
+    GEMINI_API_KEYS: Annotated[List[str], NoDecode] = []
+    # Batch evaluations in flight at once; keep within the keys' combined rate limits
+    GEMINI_MAX_CONCURRENCY: int = 8
     # Optional: Google Programmable Search Engine (CSE) for web search (free tier)
-    GOOGLE_CSE_API_KEY: str = os.getenv("GOOGLE_CSE_API_KEY", "")
-    GOOGLE_CSE_CX: str = os.getenv("GOOGLE_CSE_CX", "")
-    
+    GOOGLE_CSE_API_KEY: str = ""
+    GOOGLE_CSE_CX: str = ""
+
+    # Semantic evaluation cache: near-duplicate ideas (cosine >= threshold) reuse a
+    # prior evaluation for up to TTL seconds. Set threshold > 1 to disable.
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_TTL: int = 6 * 3600
+    # Optional shared cache (e.g. redis://localhost:6379/0) so evaluations are reused
+    # across workers and restarts; unset keeps every cache in-process
+    REDIS_URL: str = ""
+    # Seconds a fetched leaderboard is served from memory (writes through this
+    # process refresh it immediately); 0 disables
+    LEADERBOARD_CACHE_TTL: float = 10.0
+    # Prime Gemini/CSE connections in the background at startup (one tiny Gemini call)
+    AGENT_WARMUP: bool = True
+    # Where the last provider reachability check is cached; empty uses the system temp dir
+    PROVIDER_STATUS_DIR: str = ""
+
     # Firebase Settings (split credentials only)
-    FIREBASE_PROJECT_ID: str = os.getenv("FIREBASE_PROJECT_ID", "")
+    FIREBASE_PROJECT_ID: str = ""
     # Split credentials (Render-friendly)
-    FIREBASE_TYPE: str = os.getenv("FIREBASE_TYPE", "service_account")
-    FIREBASE_PRIVATE_KEY_ID: str = os.getenv("FIREBASE_PRIVATE_KEY_ID", "")
-    FIREBASE_PRIVATE_KEY: str = os.getenv("FIREBASE_PRIVATE_KEY", "")
-    FIREBASE_CLIENT_EMAIL: str = os.getenv("FIREBASE_CLIENT_EMAIL", "")
-    FIREBASE_CLIENT_ID: str = os.getenv("FIREBASE_CLIENT_ID", "")
-    FIREBASE_AUTH_URI: str = os.getenv("FIREBASE_AUTH_URI", "https://accounts.google.com/o/oauth2/auth")
-    FIREBASE_TOKEN_URI: str = os.getenv("FIREBASE_TOKEN_URI", "https://oauth2.googleapis.com/token")
-    FIREBASE_AUTH_PROVIDER_X509_CERT_URL: str = os.getenv(
-        "FIREBASE_AUTH_PROVIDER_X509_CERT_URL", "https://www.googleapis.com/oauth2/v1/certs"
-    )
-    FIREBASE_CLIENT_X509_CERT_URL: str = os.getenv("FIREBASE_CLIENT_X509_CERT_URL", "")
-    FIREBASE_UNIVERSE_DOMAIN: str = os.getenv("FIREBASE_UNIVERSE_DOMAIN", "googleapis.com")
-    
+    FIREBASE_TYPE: str = "service_account"
+    FIREBASE_PRIVATE_KEY_ID: str = ""
+    FIREBASE_PRIVATE_KEY: str = ""
+    FIREBASE_CLIENT_EMAIL: str = ""
+    FIREBASE_CLIENT_ID: str = ""
+    FIREBASE_AUTH_URI: str = "https://accounts.google.com/o/oauth2/auth"
+    FIREBASE_TOKEN_URI: str = "https://oauth2.googleapis.com/token"
+    FIREBASE_AUTH_PROVIDER_X509_CERT_URL: str = "https://www.googleapis.com/oauth2/v1/certs"
+    FIREBASE_CLIENT_X509_CERT_URL: str = ""
+    FIREBASE_UNIVERSE_DOMAIN: str = "googleapis.com"
+
+    @field_validator("CORS_ORIGINS", "GEMINI_API_KEYS", mode="before")
+    @classmethod
+    def _split_csv(cls, value):
+        """Accept comma-separated env strings for list settings."""
+        if isinstance(value, str):
+            return [v.strip() for v in value.split(",") if v.strip()]
+        return value
+
+    @cached_property
+    def CORS_ORIGINS_SET(self) -> FrozenSet[str]:
+        """CORS_ORIGINS as a frozenset for O(1) per-request origin checks."""
+        return frozenset(self.CORS_ORIGINS)
+
+    # Provider metadata (cheap; safe for probes)
+    @cached_property
+    def provider_index(self) -> Dict[str, Dict[str, bool]]:
+        """Which optional providers are configured, without building any credentials."""
+        return {
+            "providers": {
+                "firebase": bool(
+                    self.FIREBASE_PRIVATE_KEY and self.FIREBASE_CLIENT_EMAIL and self.FIREBASE_PRIVATE_KEY_ID
+                ),
+                "gemini": bool(self.GEMINI_API_KEY or self.GEMINI_API_KEYS),
+                "search": bool(self.GOOGLE_CSE_API_KEY and self.GOOGLE_CSE_CX),
+            }
+        }
+
+    @cached_property
+    def firebase_credentials(self) -> Optional[Dict[str, Any]]:
+        """Service-account info assembled from the split FIREBASE_* values.
+
+        Built on first access (Firebase initialization) rather than at import.
+        Returns None when the split credentials are incomplete.
+        """
+        if not self.provider_index["providers"]["firebase"]:
+            return None
+        return {
+            "type": self.FIREBASE_TYPE or "service_account",
+            "project_id": self.FIREBASE_PROJECT_ID,
+            "private_key_id": self.FIREBASE_PRIVATE_KEY_ID,
+            # Ensure newlines are real
+            "private_key": self.FIREBASE_PRIVATE_KEY.replace("\\n", "\n"),
+            "client_email": self.FIREBASE_CLIENT_EMAIL,
+            "client_id": self.FIREBASE_CLIENT_ID,
+            "auth_uri": self.FIREBASE_AUTH_URI,
+            "token_uri": self.FIREBASE_TOKEN_URI,
+            "auth_provider_x509_cert_url": self.FIREBASE_AUTH_PROVIDER_X509_CERT_URL,
+            "client_x509_cert_url": self.FIREBASE_CLIENT_X509_CERT_URL,
+            "universe_domain": self.FIREBASE_UNIVERSE_DOMAIN,
+        }
+
+    @cached_property
+    def provider_status_file(self) -> Path:
+        """Where the last provider check is cached (outside the source tree)."""
+        return Path(self.PROVIDER_STATUS_DIR or tempfile.gettempdir()) / _PROVIDER_STATUS_FILENAME
+
+    def provider_status(self) -> Dict[str, Any]:
+        """Last known provider reachability (may be empty or stale; never blocks)."""
+        with _provider_status_lock:
+            return dict(_provider_status)
+
+    def refresh_provider_status(self) -> None:
+        """Serve the cached status file if fresh; otherwise refresh it in the background.
+
+        Called from the app's startup (lifespan), not at import, so importing the
+        config never touches the network or the filesystem.
+        """
+        try:
+            cached = json.loads(self.provider_status_file.read_text())
+        except (OSError, ValueError):
+            cached = {}
+        if cached:
+            with _provider_status_lock:
+                _provider_status.update(cached)
+        if time.time() - cached.get("checked_at", 0) < _PROVIDER_STATUS_MAX_AGE:
+            return
+        threading.Thread(
+            target=_probe_providers,
+            args=(dict(self.provider_index["providers"]), self.provider_status_file),
+            name="provider-status-probe",
+            daemon=True,
+        ).start()
+
     # Validation
     def validate_settings(self) -> None:
         """Validate that all required settings are present"""
         # Keep non-fatal to allow running without Gemini in dev or fallback mode
         if not (self.GEMINI_API_KEY or self.GEMINI_API_KEYS):
-            import logging
             logging.getLogger(__name__).warning(
                 "No Gemini API key configured; AI evaluation will use a safe fallback."
             )
     # Firestore does not require a database URL
 
-# Create settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide Settings, creating and validating it on first use.
+
+    Usable as a FastAPI dependency (`Depends(get_settings)`); tests can call
+    `get_settings.cache_clear()` to rebuild from a patched environment.
+    Set TESTING=1 to skip validate_settings().
+    """
+    s = Settings()
+    if os.environ.get("TESTING") != "1":
+        s.validate_settings()
+    return s
+
 
-# Validate settings on import
-settings.validate_settings()
+# Module-level handle for existing `from ..core.config import settings` imports
+settings = get_settings()
@@ -1,16 +1,29 @@
 # Models package
-from .schemas import (
-    IdeaSubmission,
-    EvaluationResponse,
-    LeaderboardEntry,
-    APIResponse,
-    HealthResponse
-)
+# Schemas are resolved lazily (PEP 562) so importing the package does not build
+# every pydantic model up front; modules importing from .schemas are unaffected.
+import importlib
 
-__all__ = [
-    "IdeaSubmission",
-    "EvaluationResponse", 
-    "LeaderboardEntry",
-    "APIResponse",
-    "HealthResponse"
-]
+_LAZY = {
+    "IdeaSubmission": ".schemas",
+    "EvaluationResponse": ".schemas",
+    "LeaderboardEntry": ".schemas",
+    "APIResponse": ".schemas",
+    "HealthResponse": ".schemas",
+    "UserProfile": ".schemas",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    try:
+        module = importlib.import_module(_LAZY[name], __name__)
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,22 +1,72 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+import math
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field
+from typing import Annotated, Any, Dict, Optional
 
-_FIREBASE_UID_DESC = "Firebase user ID"
+# Field definitions shared by the submission and profile models
+_UID_FIELD = Field(..., description="Firebase user ID")
+_NAME_FIELD = Field(..., min_length=1, max_length=100, description="User's full name")
+_BRANCH_FIELD = Field(..., min_length=1, max_length=200, description="Academic branch/department")
+_ROLL_NUMBER_FIELD = Field(..., min_length=1, max_length=20, description="Student roll number")
+
+# Immutable models built only from known keys (server-side or fixed client payloads)
+_STRICT_FROZEN = ConfigDict(frozen=True, extra="forbid")
+# Immutable models that may be rebuilt from Firestore documents carrying extra fields
+_FROZEN = ConfigDict(frozen=True)
 
 class IdeaSubmission(BaseModel):
     """Model for idea submission request"""
-    uid: str = Field(..., description=_FIREBASE_UID_DESC)
-    name: str = Field(..., min_length=1, max_length=100, description="User's full name")
-    branch: str = Field(..., min_length=1, max_length=200, description="Academic branch/department")
-    rollNumber: str = Field(..., min_length=1, max_length=20, description="Student roll number")
+    model_config = _STRICT_FROZEN
+
+    uid: str = _UID_FIELD
+    name: str = _NAME_FIELD
+    branch: str = _BRANCH_FIELD
+    rollNumber: str = _ROLL_NUMBER_FIELD
     idea: str = Field(..., min_length=50, max_length=2000, description="Business idea description")
 
+def _clamp_score(v: Any) -> int:
+    try:
+        # Half-up, so "85.5" and 99.6 round rather than fail or truncate
+        score = math.floor(float(v) + 0.5)
+    except (TypeError, ValueError, OverflowError):
+        # Raised as ValueError so pydantic reports it as a ValidationError
+        raise ValueError(f"score must be a number, got {v!r}") from None
+    return max(0, min(100, score))
+
+
+# A 0-100 criterion score as the model wrote it: rounded to int, out-of-range values clamped
+ModelScore = Annotated[int, BeforeValidator(_clamp_score)]
+
+
+class ModelScores(BaseModel):
+    """The five criteria + feedback from a Gemini reply, validated in one pydantic-core pass."""
+
+    aiRelevance: ModelScore
+    creativity: ModelScore
+    impact: ModelScore
+    clarity: ModelScore
+    funFactor: ModelScore
+    feedback: str = Field(..., min_length=50)
+
+    def with_total(self) -> Dict[str, Any]:
+        """model_dump() plus totalScore, the mean of the criteria rounded half-up.
+
+        A fifth of an integer never ends in exactly .5, so integer math matches round().
+        """
+        data = self.model_dump()
+        data['totalScore'] = (
+            self.aiRelevance + self.creativity + self.impact + self.clarity + self.funFactor + 2
+        ) // 5
+        return data
+
+
 class EvaluationResponse(BaseModel):
     """Primary evaluation response (new 2025 criteria only).
 
     The model returns the five atomic dimensions. We compute totalScore server-side
     as a simple rounded average (0-100) for leaderboard use.
     """
+    model_config = _FROZEN
+
     aiRelevance: int = Field(..., ge=0, le=100, description="Centrality & plausibility of AI usage")
     creativity: int = Field(..., ge=0, le=100, description="Originality / novelty")
     impact: int = Field(..., ge=0, le=100, description="Real-world benefit & timeliness")
@@ -28,19 +78,25 @@ class EvaluationResponse(BaseModel):
 
 class LeaderboardEntry(BaseModel):
     """Model for leaderboard entry"""
-    uid: str = Field(..., description=_FIREBASE_UID_DESC)
+    model_config = _STRICT_FROZEN
+
+    uid: str = _UID_FIELD
     name: str = Field(..., description="User's full name")
     branch: str = Field(..., description="Academic branch/department")
     score: int = Field(..., ge=0, le=100, description="Total score (0-100)")
 
 class APIResponse(BaseModel):
     """Generic API response model"""
+    model_config = _STRICT_FROZEN
+
     status: str = Field(..., description="Response status")
     message: str = Field(..., description="Response message")
     data: Optional[dict] = Field(None, description="Optional response data")
 
 class HealthResponse(BaseModel):
     """Health check response model"""
+    model_config = _STRICT_FROZEN
+
     status: str = Field(..., description="Service health status")
     message: str = Field(..., description="Health check message")
     timestamp: str = Field(..., description="Response timestamp")
@@ -48,12 +104,14 @@ class HealthResponse(BaseModel):
 
 class UserProfile(BaseModel):
     """User profile stored in Firestore"""
-    uid: str = Field(..., description=_FIREBASE_UID_DESC)
-    name: str = Field(..., min_length=1, max_length=100)
+    model_config = _FROZEN
+
+    uid: str = _UID_FIELD
+    name: str = _NAME_FIELD
     email: Optional[str] = Field(None, max_length=200)
     photoURL: Optional[str] = Field(None)
-    branch: str = Field(..., min_length=1, max_length=200)
-    rollNumber: str = Field(..., min_length=1, max_length=20)
+    branch: str = _BRANCH_FIELD
+    rollNumber: str = _ROLL_NUMBER_FIELD
     createdAt: Optional[str] = Field(None, description="ISO timestamp when created")
     updatedAt: Optional[str] = Field(None, description="ISO timestamp when updated")
     lastEvaluation: Optional[EvaluationResponse] = Field(None, description="Most recent AI evaluation")
@@ -1,6 +1,7 @@
 # routers/chat_router.py
 from fastapi import APIRouter, HTTPException
-from ..services.chatbot_service import chatbot_service
+from fastapi.concurrency import run_in_threadpool
+from ..services.chatbot_service import get_chatbot_service
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/ideas", tags=["chat"])
@@ -14,7 +15,7 @@ class ChatResponse(BaseModel):
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(req: ChatRequest):
     try:
-        reply = chatbot_service.get_chat_response(req.message)
+        reply = await run_in_threadpool(get_chatbot_service().get_chat_response, req.message)
         return {"reply": reply}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,29 +1,55 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from datetime import datetime, timezone
+import time
 from ..models.schemas import HealthResponse, APIResponse
-from ..core.config import settings
+from ..core.config import Settings, get_settings
 
 router = APIRouter(prefix="", tags=["health"])
 
+# [epoch_second, iso_string] – health probes within the same second share one timestamp
+_ts_cache = [0, ""]
+
+
+def _iso_now() -> str:
+    """UTC ISO timestamp truncated to the second, formatted at most once per second."""
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[:] = [now, datetime.fromtimestamp(now, timezone.utc).isoformat()]
+    return _ts_cache[1]
+
+# These payloads are built server-side from trusted values, so they are returned
+# as plain dicts through ORJSONResponse; response_model is kept for the OpenAPI
+# schema only and FastAPI skips validating a Response returned directly.
+_ROOT_PAYLOAD = {
+    "status": "success",
+    "message": "MindForge API is running",
+    "data": {"version": "1.0.0", "service": "MindForge API"},
+}
+
 @router.get("/", response_model=APIResponse)
 async def root():
     """Root endpoint - API status"""
-    return APIResponse(
-        status="success",
-    message="MindForge API is running",
-    data={"version": "1.0.0", "service": "MindForge API"}
-    )
+    return ORJSONResponse(_ROOT_PAYLOAD)
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    return HealthResponse(
-        status="healthy",
-        message="API is running successfully",
-        timestamp=datetime.now(timezone.utc).isoformat()
-    )
+    return ORJSONResponse({
+        "status": "healthy",
+        "message": "API is running successfully",
+        "timestamp": _iso_now(),
+    })
 
 @router.get("/config/round", response_model=APIResponse)
-async def current_round():
-    """Expose current round number for clients"""
-    return APIResponse(status="success", message="OK", data={"currentRound": str(settings.CURRENT_ROUND)})
+async def current_round(settings: Settings = Depends(get_settings)):
+    """Expose current round number (and configured providers) for clients"""
+    return ORJSONResponse({
+        "status": "success",
+        "message": "OK",
+        "data": {
+            "currentRound": str(settings.CURRENT_ROUND),
+            **settings.provider_index,
+            "providerStatus": settings.provider_status(),
+        },
+    })
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import logging
 from ..models.schemas import IdeaSubmission, EvaluationResponse
-from ..services import ai_service, firebase_service
-from ..services.agent_service import agent_service
+from ..services import get_firebase_service
 from ..services.evaluation_queue import evaluation_queue
 from fastapi import BackgroundTasks
 from typing import Dict, Any
@@ -22,7 +22,7 @@ async def submit_idea_async(submission: IdeaSubmission):
     """
     # Duplicate submission guard (same as sync path)
     try:
-        existing_profile = firebase_service.get_user_profile(submission.uid) or {}
+        existing_profile = await run_in_threadpool(get_firebase_service().get_user_profile, submission.uid) or {}
     except Exception:
         existing_profile = {}
     if existing_profile.get("hasSubmitted"):
@@ -1,17 +1,22 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
 import logging
 from ..models.schemas import LeaderboardEntry
-from ..services import firebase_service
+from ..services import get_firebase_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
 
+
 @router.get("", response_model=List[LeaderboardEntry])
-async def get_leaderboard():
+async def get_leaderboard(limit: Optional[int] = Query(None, ge=1, le=1000, description="Return only the top N entries")):
     """
     Get current leaderboard rankings
     
+    Args:
+        limit: Optional top-N cut, applied by Firestore
+    
     Returns:
         List[LeaderboardEntry]: Sorted leaderboard data
         
@@ -19,31 +24,31 @@ async def get_leaderboard():
         HTTPException: If leaderboard data cannot be retrieved
     """
     try:
-        # Get leaderboard data from Firebase
-        leaderboard_data = firebase_service.get_leaderboard()
+        # Get leaderboard data from Firebase; cache hits skip the threadpool hop
+        firebase_service = get_firebase_service()
+        leaderboard_data = firebase_service.cached_leaderboard(limit)
+        if leaderboard_data is None:
+            leaderboard_data = await run_in_threadpool(firebase_service.get_leaderboard, limit)
         
         if not leaderboard_data:
             return []
         
-        # Convert to list and sort by score
-        leaderboard_list = []
-        for uid, data in leaderboard_data.items():
-            entry = LeaderboardEntry(
+        # Rows arrive already ranked by Firestore and are server-written; skip re-validation
+        # Preallocated and filled by index so large boards never trigger a resize
+        leaderboard_list = [None] * len(leaderboard_data)
+        for i, (uid, data) in enumerate(leaderboard_data.items()):
+            leaderboard_list[i] = LeaderboardEntry.model_construct(
                 uid=uid,
                 name=data.get('name', 'Unknown'),
                 branch=data.get('branch', 'Unknown'),
-                score=data.get('score', 0)
+                score=data.get('score', 0),
             )
-            leaderboard_list.append(entry)
-        
-        # Sort by score in descending order
-        leaderboard_list.sort(key=lambda x: x.score, reverse=True)
         
-        logger.info(f"Retrieved leaderboard with {len(leaderboard_list)} entries")
+        logger.debug("Retrieved leaderboard with %d entries", len(leaderboard_list))
         return leaderboard_list
         
     except Exception as e:
-        logger.error(f"Failed to retrieve leaderboard: {e}")
+        logger.error("Failed to retrieve leaderboard: %s", e)
         raise HTTPException(
             status_code=500, 
             detail="Failed to fetch leaderboard data"
@@ -1,31 +1,33 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from datetime import datetime, timezone
 import logging
 from ..models.schemas import UserProfile
-from ..services import firebase_service
+from ..services import get_firebase_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/users", tags=["users"])
+UTC = timezone.utc
 
 
 @router.post("/profile", response_model=UserProfile)
 async def upsert_profile(profile: UserProfile):
     """Create or update a user's profile in Firestore"""
     try:
-        now = datetime.now(timezone.utc).isoformat()
+        now = datetime.now(UTC).isoformat()
         payload = profile.model_dump()
         payload["updatedAt"] = now
         if not payload.get("createdAt"):
             payload["createdAt"] = now
 
-        ok = firebase_service.upsert_user_profile(profile.uid, payload)
+        ok = await run_in_threadpool(get_firebase_service().upsert_user_profile, profile.uid, payload)
         if not ok:
             raise HTTPException(status_code=500, detail="Failed to save user profile")
         return UserProfile(**payload)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error upserting user profile: {e}")
+        logger.error("Error upserting user profile: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
@@ -33,8 +35,8 @@ async def upsert_profile(profile: UserProfile):
 async def get_profile(uid: str):
     """Get a user's profile from Firestore"""
     try:
-        data = firebase_service.get_user_profile(uid)
+        data = await run_in_threadpool(get_firebase_service().get_user_profile, uid)
         return UserProfile(**data) if data else None
     except Exception as e:
-        logger.error(f"Error fetching user profile {uid}: {e}")
+        logger.error("Error fetching user profile %s: %s", uid, e)
         raise HTTPException(status_code=500, detail="Internal server error")
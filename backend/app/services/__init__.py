@@ -1,7 +1,8 @@
 # Services package
-from .firebase_service import firebase_service
-from .ai_service import ai_service
-from .agent_service import agent_service
-from .chatbot_service import chatbot_service
+# Services are built on first use through these accessors, not at import
+from .firebase_service import get_firebase_service
+from .ai_service import get_ai_service
+from .agent_service import get_agent_service
+from .chatbot_service import get_chatbot_service
 
-__all__ = ["firebase_service", "ai_service", "agent_service","chatbot_service"]
+__all__ = ["get_firebase_service", "get_ai_service", "get_agent_service", "get_chatbot_service"]
@@ -16,111 +16,450 @@ Design goals:
 
 from __future__ import annotations
 
-import json
+import asyncio
+import html
 import logging
+import os
+import re
+import threading
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple, Set
+from urllib.parse import urlsplit
 
-import google.generativeai as genai
+import orjson
 import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from ..core.config import settings
-from ..models.schemas import IdeaSubmission, EvaluationResponse
+from ..models.schemas import IdeaSubmission, EvaluationResponse, ModelScores
 from datetime import datetime, timezone
-from .gemini_client import GeminiMultiKeyClient
+from .gemini_client import GeminiBase, first_json_object, json_object_end, read_stream
+from .retry import with_retry
+from .semantic_cache import get_shared_semantic_cache
+from .singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
+# Search/fetch calls are network-bound; fan them out on a small shared pool
+_IO_WORKERS = 8
+# Wall-clock cap on a search fan-out: a straggling query is dropped rather than
+# holding up the whole evaluation (it still completes and warms the cache)
+_SEARCH_FANOUT_TIMEOUT = 5.0
+# Same idea for page fetches: pages not back in time are simply left without an excerpt
+_FETCH_FANOUT_TIMEOUT = 6.0
+# Distinct hosts whose keep-alive pools are kept (CSE + the sites we fetch from)
+_HTTP_HOST_POOLS = 32
+# Concurrent page fetches allowed against any one host (the pool bounds the total)
+_PER_HOST_FETCHES = 2
+# After a CSE 429, skip search for Retry-After seconds, or an exponentially
+# growing pause (doubling from 1s) when the header is absent
+_CSE_BACKOFF_MIN = 1.0
+_CSE_BACKOFF_MAX = 60.0
+
+# Page fetches stop reading after this many bytes; the main text of an article
+# is almost always inside the first 64 KB and we only keep a few KB of it anyway
+_MAX_FETCH_BYTES = 64 * 1024
+_FETCH_CHUNK = 8192
+_SCRIPT_STYLE_RE = re.compile(r"<(script|style|noscript|svg|head)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]*>")
+_WS_RE = re.compile(r"\s+")
+# Sentence boundary: whitespace after terminal punctuation
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# Sentences mentioning any of these are preferred for page excerpts; matched as
+# case-insensitive substrings by one compiled alternation (a single pass per sentence)
+_EXCERPT_KEYWORDS = (
+  'ai', 'artificial', 'market', 'trend', 'adoption', 'challenge', 'regulation', 'risk',
+  'feasibility', 'startup', 'user', 'growth',
+)
+_EXCERPT_RE = re.compile('|'.join(map(re.escape, _EXCERPT_KEYWORDS)), re.IGNORECASE)
+_EXCERPT_PICKS = 5
+
+# Core-term extraction: delimiters mapped to spaces, plus words too generic to search on
+_TERM_DELIMITERS = str.maketrans({c: ' ' for c in ".,:;()[]{}!?\"'"})
+_STOP_TERMS = frozenset({
+  'the','a','an','and','or','for','with','using','use','to','of','in','on','by','from','this','that','ai','ml','data',
+  'we','our','it','its','is','are','be','as','at','into','via','will','can','users','user','app','platform'
+})
+
+# Domain inference: keywords are matched as substrings of the idea's core terms;
+# earlier domains win. A single alternation with one named group per domain, so
+# the terms are scanned once and the match's lastgroup names its domain.
+_DOMAIN_KEYWORDS = {
+  'health': ['health','medical','clinic','patient','hospital','wellness','diagnosis','disease'],
+  'education': ['learn','student','class','school','education','tutor','university'],
+  'finance': ['bank','finance','trading','investment','loan','credit','stock','fintech','payment'],
+  'agriculture': ['crop','farm','soil','agri','agriculture','farmer','yield'],
+  'environment': ['climate','carbon','emission','green','sustain','ecology','environment','recycle'],
+  'retail': ['retail','ecommerce','shopping','buyer','seller','merchant','inventory'],
+  'social': ['community','social','connect','network','share','friends'],
+  'mobility': ['transport','logistic','delivery','route','traffic','fleet','mobility']
+}
+_DOMAIN_PRIORITY = {domain: i for i, domain in enumerate(_DOMAIN_KEYWORDS)}
+_DOMAIN_RE = re.compile('|'.join(
+  f"(?P<{domain}>{'|'.join(map(re.escape, keys))})" for domain, keys in _DOMAIN_KEYWORDS.items()
+))
+
+# A well-formed reply (analysis + JSON) is a few KB; output running past this
+# without a closed JSON object is malformed, so stop reading and fall back
+_MAX_RESPONSE_CHARS = 16_000
+
+# Body of a ```json / ``` fenced block in model output
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+# Only this many results make it into context_bundle, so nothing beyond it is
+# kept, fetched or serialised; per-query CSE pages stay small to match
+_CONTEXT_ENTRIES = 5
+_CSE_ENDPOINT = "https://www.googleapis.com/customsearch/v1"
+_CSE_RESULTS_PER_QUERY = 3
+# Pitches yielding fewer core terms than this (or than the second value when no
+# domain is recognised) carry too little signal to search on; retrieval is skipped
+_MIN_SEARCH_TERMS = 2
+_MIN_SEARCH_TERMS_NO_DOMAIN = 3
+
+# CSE results per normalised query; topics repeat a lot within a session, and six
+# hours keeps "current" market context reasonably fresh
+_SEARCH_CACHE_SIZE = 512
+_SEARCH_CACHE_TTL = 6 * 3600
+# Extracted page text per (url, max_chars); pages change slowly
+_PAGE_CACHE_SIZE = 256
+_PAGE_CACHE_TTL = 6 * 3600
+
+_MODEL_NAME = 'gemini-2.5-flash'
+
+# Static judging rubric + output contract. It is sent as the leading block of every
+# evaluation prompt (identical bytes each time) so Gemini's implicit prefix caching
+# can reuse it; only the per-submission block after it changes. At ~700 tokens it is
+# below the minimum size for an explicit CachedContent, so none is created.
+_STATIC_PROMPT = (
+  "SYSTEM ROLE\n"
+  "You are MindForge Evaluator, an impartial, context-aware judge for short (~50-word) creative AI idea pitches from college freshmen. "
+  "Your sole output is strict JSON with exactly six keys: aiRelevance, creativity, impact, clarity, funFactor, feedback. No additional commentary.\n\n"
+  "CONTEXT HANDLING\n"
+  "You may receive context_bundle containing brief, recent web snippets (lightweight search grounding).\n"
+  "- Use it ONLY to assess timeliness, feasibility, originality signals, or market alignment.\n"
+  "- If context_bundle is empty or sparse: fallback to general knowledge cautiously; NEVER hallucinate statistics or specific market sizes.\n"
+  "- Do NOT copy long passages—condense signals.\n\n"
+  "SCORING CRITERIA (0–100 integers each, evaluated INDEPENDENTLY; DO NOT average or compute a total):\n"
+  "aiRelevance & Applicability:\n"
+  "  0–39  AI irrelevant / vague / implausible.\n"
+  "  40–69 Clear but generic or partially impractical.\n"
+  "  70–89 Central & plausible with current tech.\n"
+  "  90–100 Core, technically sound, well-integrated.\n"
+  "creativity & Originality:\n"
+  "  0–39 Generic / overused.\n"
+  "  40–69 Some novelty; predictable.\n"
+  "  70–89 Fresh twist; clever adaptation.\n"
+  "  90–100 Highly original; unexpected yet sensible.\n"
+  "impact (Real-World Benefit):\n"
+  "  0–39 No clear benefit / audience.\n"
+  "  40–69 Limited or niche benefit.\n"
+  "  70–89 Significant benefit for a defined group/sector.\n"
+  "  90–100 Major potential impact; timely & relevant (context supports).\n"
+  "clarity & Presentation (target ~50 words):\n"
+  "  0–39 Confusing / incoherent.\n"
+  "  40–69 Understandable but incomplete / awkward.\n"
+  "  70–89 Clear problem + AI role + outcome.\n"
+  "  90–100 Crisp, engaging, plain language.\n"
+  "funFactor (Delight / Wow):\n"
+  "  0–39 Forgettable.\n"
+  "  40–69 Mildly interesting.\n"
+  "  70–89 Memorable & engaging.\n"
+  "  90–100 Standout; sparks excitement.\n\n"
+  "FEEDBACK REQUIREMENTS\n"
+  "- Single JSON string field (feedback) length 50–800 chars.\n"
+  "- Structure: (a) Strengths; (b) Specific improvements / next step.\n"
+  "- Be concrete (avoid 'improve scalability' without saying HOW).\n"
+  "- No bullet characters; use sentences.\n"
+  "- Do not reference score numbers explicitly.\n\n"
+  "OUTPUT FORMAT (STRICT JSON ONLY — NO MARKDOWN, NO EXTRA KEYS):\n"
+  "{\n  \"aiRelevance\": <0-100>,\n  \"creativity\": <0-100>,\n  \"impact\": <0-100>,\n  \"clarity\": <0-100>,\n  \"funFactor\": <0-100>,\n  \"feedback\": \"<50-800 chars>\"\n}\n"
+  "RULES\n"
+  "- All scores MUST be integers, no quotes.\n"
+  "- No trailing commas.\n"
+  "- Do NOT add fields (e.g., total, reasoning, confidence).\n"
+  "- If pitch severely lacks info, still score (low) and state the missing elements in feedback.\n"
+  "\nThink briefly before answering. Return exactly two blocks in order:\n"
+  "ANALYSIS:\n<bullet list of 3-7 grounded insight bullets WITHOUT referencing source ids if used like [1],[2]>\nEND_ANALYSIS\n"
+  "JSON_RESPONSE:\n<ONLY the specified JSON schema with 5 keys + feedback>\nEND_JSON_RESPONSE\n\n"
+  "The submission to evaluate and its context_bundle follow.\n\n"
+)
+
+# Per-call blocks as bound str.format templates: one substitution pass per call
+_format_submission = (
+  "SUBMISSION METADATA\nStudent: {name}\nBranch: {branch}\nRoll Number: {roll}\n\n"
+  "PITCH (verbatim):\n{idea}\n\n"
+  "{context}"
+).format
+_format_context = (
+  "context_bundle = {bundle}\n"
+  "If context_bundle is empty, rely on general knowledge but DO NOT hallucinate unknown current statistics.\n"
+).format
+
+
+@dataclass(slots=True)
 class WebResult:
-  """Simple container for a web search result."""
+  """Simple container for a web search result (slotted: no per-instance __dict__)."""
   title: str
   link: str
   snippet: str
+  host: str = ''
   content: Optional[str] = None
 
 
-class AgentService:
+def _link_host(link: str) -> str:
+  """Network location of a result link; the link itself if it has none."""
+  try:
+    return urlsplit(link).netloc or link
+  except ValueError:
+    return link
+
+
+class AgentService(GeminiBase):
   """Agentic service that augments Gemini with web search and retrieval."""
 
   def __init__(self) -> None:
     # Configure Gemini
     # Prefer multi-key rotation if provided, else fall back to single key model
-    self.multi_client: Optional[GeminiMultiKeyClient] = None
-    try:
-      if settings.GEMINI_API_KEYS:
-        self.multi_client = GeminiMultiKeyClient(settings.GEMINI_API_KEYS, 'gemini-2.5-flash')
-        self.model = None
-        logger.info("AgentService using GeminiMultiKeyClient (round-robin keys)")
-      else:
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-        logger.info("Gemini AI initialized for AgentService (single key)")
-    except Exception as e:
-      self.model = None
-      self.multi_client = None
-      logger.warning(f"Gemini init failed for AgentService: {e}")
+    self._initialize_genai(_MODEL_NAME)
 
     # Configure Google CSE
     self.google_api_key = settings.GOOGLE_CSE_API_KEY
     self.google_cx = settings.GOOGLE_CSE_CX
 
+    # One keep-alive session + worker pool reused across evaluations
+    self._http = requests.Session()
+    self._http.headers["User-Agent"] = "MindForge-Agent/1.0"
+    adapter = HTTPAdapter(
+      pool_connections=_HTTP_HOST_POOLS,
+      pool_maxsize=_IO_WORKERS,
+      # Transient 5xx get two quick retries at the transport level. 429s are not
+      # retried and Retry-After is never slept on here (urllib3 does not cap it, so
+      # one throttled host could pin an agent-io thread); rate limits are handled
+      # by the app (_cse_throttled). raise_on_status=False hands back the final
+      # response, so callers still see the status and headers through raise_for_status()
+      max_retries=Retry(
+        total=2, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504),
+        allowed_methods=("GET",), raise_on_status=False, respect_retry_after_header=False,
+      ),
+    )
+    self._http.mount("https://", adapter)
+    self._http.mount("http://", adapter)
+    self._io_pool = ThreadPoolExecutor(max_workers=_IO_WORKERS, thread_name_prefix="agent-io")
+    # Per-host fetch slots, so one site never sees the whole pool at once
+    self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+    self._host_slots_lock = threading.Lock()
+    # CSE throttling state: searches are skipped until _cse_backoff_until (monotonic)
+    self._cse_backoff = 0.0
+    self._cse_backoff_until = 0.0
+
+    # Concurrent identical searches/page fetches (across evaluations) share one request
+    self._inflight = SingleFlight()
+
+    # (normalised query, num) -> ((title, link, snippet, host), ...)
+    self._search_cache: TTLCache = TTLCache(maxsize=_SEARCH_CACHE_SIZE, ttl=_SEARCH_CACHE_TTL)
+    # (url, max_chars) -> extracted text
+    self._page_cache: TTLCache = TTLCache(maxsize=_PAGE_CACHE_SIZE, ttl=_PAGE_CACHE_TTL)
+    self._cache_lock = threading.Lock()
+    self._cache_stats: Counter = Counter()
+
+    # Near-duplicate ideas reuse a recent evaluation instead of re-running the pipeline
+    # (one process-wide cache, shared with AIService)
+    self._semantic_cache = get_shared_semantic_cache(
+      self._embed,
+      threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+      ttl_seconds=settings.SEMANTIC_CACHE_TTL,
+    )
+
+    if settings.AGENT_WARMUP and os.environ.get("TESTING") != "1":
+      threading.Thread(target=self._warmup, name="agent-warmup", daemon=True).start()
+
+  def _warmup(self) -> None:
+    """Open the Gemini and googleapis connections before the first real evaluation.
+
+    Single-key only for Gemini: the multi-key client reconfigures the SDK per call,
+    so there is no long-lived connection to prime. The CSE host is primed with a
+    plain HEAD so no search quota is spent.
+    """
+    started = time.perf_counter()
+    if self.model and settings.GEMINI_API_KEY:
+      try:
+        self.model.generate_content("ok", generation_config={"max_output_tokens": 1})
+      except Exception as e:  # noqa: BLE001
+        logger.debug("agent.warmup gemini fail error=%s", e)
+    if self.google_api_key and self.google_cx:
+      try:
+        self._http.head("https://www.googleapis.com/", timeout=5)
+      except Exception as e:  # noqa: BLE001
+        logger.debug("agent.warmup cse fail error=%s", e)
+    logger.debug("agent.warmup done elapsed_ms=%.1f", (time.perf_counter()-started)*1000)
+
   # -----------------------
   # Web search and scraping
   # -----------------------
-  def _search_web(self, query: str, num: int = 4) -> List[WebResult]:
+  def _search_web(self, query: str, num: int = _CSE_RESULTS_PER_QUERY) -> List[WebResult]:
     """Search the web using Google Programmable Search Engine.
 
-    Returns a small list of WebResult with titles/snippets/links.
+    Returns a small list of WebResult with titles/snippets/links. Successful
+    non-empty results are cached per normalised query for _SEARCH_CACHE_TTL.
     """
     if not self.google_api_key or not self.google_cx:
       logger.info("Google CSE keys missing; skipping web search")
       return []
+    cache_key = (_WS_RE.sub(' ', query.lower()).strip()[:256], num)
+    with self._cache_lock:
+      cached = self._search_cache.get(cache_key)
+      self._cache_stats['search_hit' if cached is not None else 'search_miss'] += 1
+    if cached is not None:
+      logger.debug("agent.search cache_hit query=%r results=%d stats=%s", query, len(cached), dict(self._cache_stats))
+    else:
+      cached = self._inflight.do(('search',) + cache_key, lambda: self._cse_query(query, num, cache_key))
+    # Fresh objects each time: callers attach fetched content to them
+    return [WebResult(*row) for row in cached]
+
+  def _cse_query(self, query: str, num: int, cache_key: Tuple[str, int]) -> Tuple[Tuple[str, str, str, str], ...]:
+    """One CSE request; returns (title, link, snippet, host) rows, caching non-empty results."""
+    # Runs as the single-flight leader: a previous leader may have filled the cache
+    # between our miss and becoming leader, in which case no request is needed.
+    with self._cache_lock:
+      cached = self._search_cache.get(cache_key)
+    if cached is not None:
+      return cached
+    if time.monotonic() < self._cse_backoff_until:
+      logger.debug("agent.search skip query=%r reason=rate_limited", query)
+      return ()
     started = time.perf_counter()
     try:
-      url = (
-        "https://www.googleapis.com/customsearch/v1"
-        f"?key={self.google_api_key}&cx={self.google_cx}&q={requests.utils.quote(query)}&num={num}"
+      res = self._http.get(
+        _CSE_ENDPOINT,
+        params={'key': self.google_api_key, 'cx': self.google_cx, 'q': query, 'num': num},
+        timeout=10,
       )
-      res = requests.get(url, timeout=10)
+      if res.status_code == 429:
+        self._cse_throttled(res)
       res.raise_for_status()
-      data = res.json()
-      items = data.get('items', [])
-      results: List[WebResult] = []
-      for it in items:
-        results.append(WebResult(
-          title=it.get('title', ''),
-          link=it.get('link', ''),
-          snippet=it.get('snippet', ''),
-        ))
+      self._cse_backoff = 0.0
+      data = orjson.loads(res.content)
+      # Host is parsed once here and cached with the row, not per scoring pass
+      rows = tuple(
+        (it.get('title', ''), link, it.get('snippet', ''), _link_host(link))
+        for it in data.get('items', [])
+        for link in (it.get('link', ''),)
+      )
+      if rows:
+        with self._cache_lock:
+          self._search_cache[cache_key] = rows
       logger.debug(
-        "agent.search ok query=%r results=%d elapsed_ms=%.1f", query, len(results), (time.perf_counter()-started)*1000
+        "agent.search ok query=%r results=%d elapsed_ms=%.1f", query, len(rows), (time.perf_counter()-started)*1000
       )
-      return results
+      return rows
     except Exception as e:
       logger.warning(
         "agent.search fail query=%r error=%s elapsed_ms=%.1f", query, e, (time.perf_counter()-started)*1000
       )
-      return []
+      return ()
+
+  def _cse_throttled(self, res: requests.Response) -> None:
+    """Pause CSE queries after a 429, honouring Retry-After when the server sends it.
+
+    The only CSE throttling handler: the session's transport retries do not cover 429s.
+    """
+    try:
+      delay = float(res.headers.get('Retry-After', ''))
+    except ValueError:
+      delay = min(_CSE_BACKOFF_MAX, max(_CSE_BACKOFF_MIN, self._cse_backoff * 2))
+    self._cse_backoff = min(_CSE_BACKOFF_MAX, max(0.0, delay))
+    self._cse_backoff_until = time.monotonic() + self._cse_backoff
+    logger.warning("agent.search rate_limited backoff_s=%.1f", self._cse_backoff)
+
+  def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+    """Semaphore limiting concurrent fetches to the url's host."""
+    host = urlsplit(url).hostname or ''
+    with self._host_slots_lock:
+      slot = self._host_slots.get(host)
+      if slot is None:
+        slot = self._host_slots[host] = threading.BoundedSemaphore(_PER_HOST_FETCHES)
+      return slot
 
   def _fetch_page(self, url: str, max_chars: int = 3000) -> Optional[str]:
+    """Fetch page text (cached for _PAGE_CACHE_TTL); concurrent fetches of the
+    same URL share one request."""
+    key = (url, max_chars)
+    with self._cache_lock:
+      cached = self._page_cache.get(key)
+      self._cache_stats['page_hit' if cached is not None else 'page_miss'] += 1
+    if cached is not None:
+      logger.debug("agent.fetch cache_hit url=%s stats=%s", url, dict(self._cache_stats))
+      return cached
+    return self._inflight.do(('page',) + key, lambda: self._download_page(url, max_chars))
+
+  def _download_page(self, url: str, max_chars: int) -> Optional[str]:
     """Fetch page content with simple heuristics.
     Note: We keep it minimal to stay within free limits and speed.
+
+    Like _cse_query, re-checks the cache first since it runs as the in-flight leader.
+
+    The body is streamed and reading stops at _MAX_FETCH_BYTES; HTML is reduced to
+    visible text (scripts/styles/markup dropped) before truncating to max_chars,
+    so the prompt budget goes to prose rather than markup.
     """
+    with self._cache_lock:
+      cached = self._page_cache.get((url, max_chars))
+    if cached is not None:
+      return cached
     try:
-      headers = {"User-Agent": "MindForge-Agent/1.0"}
-      res = requests.get(url, timeout=10, headers=headers)
-      res.raise_for_status()
-      text = res.text
-      # Basic sanitization: strip scripts/styles if present
-      # (We keep it simple; a real agent could use readability libraries.)
-      # Truncate to avoid blowing token budget
-      return text[:max_chars]
+      with self._host_slot(url), self._http.get(url, timeout=10, stream=True) as res:
+        res.raise_for_status()
+        ctype = res.headers.get('Content-Type', '').lower()
+        if ctype and not ('text' in ctype or 'html' in ctype or 'xml' in ctype):
+          return None  # PDFs, images, etc. are not worth the bytes
+        # Markup needs a wider window to yield max_chars of visible text; plain
+        # text never needs more than max_chars * 4 bytes (worst-case UTF-8)
+        maybe_markup = not ctype or 'html' in ctype or 'xml' in ctype
+        limit = _MAX_FETCH_BYTES if maybe_markup else max_chars * 4
+        buf = bytearray()
+        for chunk in res.iter_content(chunk_size=_FETCH_CHUNK):
+          buf += chunk
+          if len(buf) >= limit:
+            break
+        # Decode straight from a view of the buffer: no bytes copy, nothing past limit
+        text = str(memoryview(buf)[:limit], res.encoding or 'utf-8', 'replace')
+      if 'html' in ctype or '<html' in text[:1024].lower():
+        text = self._html_to_text(text)
+      text = text[:max_chars]
+      if text:
+        with self._cache_lock:
+          self._page_cache[(url, max_chars)] = text
+      return text
     except Exception:
       return None
 
+  @staticmethod
+  def _html_to_text(raw: str) -> str:
+    """Strip non-content blocks and tags, unescape entities, collapse whitespace."""
+    text = _SCRIPT_STYLE_RE.sub(' ', raw)
+    text = _COMMENT_RE.sub(' ', text)
+    text = _TAG_RE.sub(' ', text)
+    return _WS_RE.sub(' ', html.unescape(text)).strip()
+
+  def _fan_out(self, fn, items: List[Any], timeout: float, default: Any = None) -> List[Any]:
+    """Run fn over items on the I/O pool; results in input order.
+
+    Wall time is bounded by `timeout`: anything unfinished by then (or that
+    raised) yields `default` instead of stalling the caller.
+    """
+    futures = [self._io_pool.submit(fn, item) for item in items]
+    done, pending = wait(futures, timeout=timeout)
+    if pending:
+      logger.debug("agent.fan_out dropped=%d of=%d timeout_s=%.1f", len(pending), len(futures), timeout)
+    return [f.result() if f in done and not f.exception() else default for f in futures]
+
   # -----------------------
   # Advanced retrieval helpers (multi-query + scoring)
   # -----------------------
@@ -130,22 +469,16 @@ class AgentService:
     We purposely keep this logic lightweight & deterministic (no extra LLM call)
     so that under heavy event load we avoid extra latency & cost.
     """
-    # Basic tokenization / filtering
-    delimiters = ".,:;()[]{}!?\"'\n\r\t"
-    raw_tokens = [t.strip(delimiters) for t in text.split()]
-    stop: Set[str] = {
-      'the','a','an','and','or','for','with','using','use','to','of','in','on','by','from','this','that','ai','ml','data',
-      'we','our','it','its','is','are','be','as','at','into','via','will','can','users','user','app','platform'
-    }
+    # Basic tokenization / filtering: punctuation becomes whitespace in one C-level pass
     candidates: List[str] = []
-    for tok in raw_tokens:
-      tok_low = tok.lower()
-      if len(tok_low) < 4 or tok_low in stop:
+    seen: Set[str] = set()
+    for tok in text.lower().translate(_TERM_DELIMITERS).split():
+      if len(tok) < 4 or tok in _STOP_TERMS or tok in seen:
         continue
-      if not tok_low.isalnum():
+      if not tok.isalnum():
         continue
-      if tok_low not in candidates:
-        candidates.append(tok_low)
+      seen.add(tok)
+      candidates.append(tok)
       if len(candidates) >= max_terms:
         break
     logger.debug("agent.terms extracted=%s", candidates)
@@ -153,21 +486,17 @@ class AgentService:
 
   def _infer_domain(self, terms: List[str]) -> Optional[str]:
     """Very light domain inference to tailor supplemental queries."""
-    domain_map = {
-      'health': ['health','medical','clinic','patient','hospital','wellness','diagnosis','disease'],
-      'education': ['learn','student','class','school','education','tutor','university'],
-      'finance': ['bank','finance','trading','investment','loan','credit','stock','fintech','payment'],
-      'agriculture': ['crop','farm','soil','agri','agriculture','farmer','yield'],
-      'environment': ['climate','carbon','emission','green','sustain','ecology','environment','recycle'],
-      'retail': ['retail','ecommerce','shopping','buyer','seller','merchant','inventory'],
-      'social': ['community','social','connect','network','share','friends'],
-      'mobility': ['transport','logistic','delivery','route','traffic','fleet','mobility']
-    }
-    for domain, keys in domain_map.items():
-      for t in terms:
-        if any(k in t for k in keys):
-          logger.debug("agent.domain inferred=%s from_term=%s", domain, t)
-          return domain
+    # Terms are single alphanumeric tokens, so a keyword match never spans the
+    # joining space. The first domain in priority order among the matches wins.
+    best: Optional[re.Match] = None
+    for m in _DOMAIN_RE.finditer(' '.join(terms)):
+      if best is None or _DOMAIN_PRIORITY[m.lastgroup] < _DOMAIN_PRIORITY[best.lastgroup]:
+        best = m
+        if _DOMAIN_PRIORITY[m.lastgroup] == 0:
+          break
+    if best is not None:
+      logger.debug("agent.domain inferred=%s from_keyword=%s", best.lastgroup, best.group(0))
+      return best.lastgroup
     logger.debug("agent.domain inferred=None")
     return None
 
@@ -202,14 +531,17 @@ class AgentService:
     )
     return final
 
-  def _aggregate_search(self, queries: List[str], per_query: int = 4, global_cap: int = 14) -> List[WebResult]:
+  def _aggregate_search(self, queries: List[str], per_query: int = _CSE_RESULTS_PER_QUERY, global_cap: int = _CONTEXT_ENTRIES) -> List[WebResult]:
     """Run multiple small searches and merge results with light scoring for diversity.
 
     We emphasize breadth (different domains / angles) instead of deep duplication.
     """
     all_results: List[Tuple[WebResult, str]] = []  # (result, originating_query)
-    for q in queries:
-      batch = self._search_web(q, num=per_query)
+    # Queries run concurrently; batches come back in query order for scoring
+    batches = self._fan_out(
+      lambda q: self._search_web(q, num=per_query), queries, _SEARCH_FANOUT_TIMEOUT, default=[]
+    )
+    for q, batch in zip(queries, batches):
       logger.debug("agent.aggregate query=%r batch=%d", q, len(batch))
       for r in batch:
         all_results.append((r, q))
@@ -221,11 +553,7 @@ class AgentService:
       if res.link in seen_links:
         continue
       seen_links.add(res.link)
-      host = ''
-      try:
-        host = res.link.split('/')[2]
-      except Exception:  # noqa: BLE001
-        host = res.link
+      host = res.host
       diversity_bonus = 1.0 if host not in seen_hosts else 0.6
       if host not in seen_hosts:
         seen_hosts.add(host)
@@ -244,36 +572,40 @@ class AgentService:
   def _lightweight_content_select(self, html: str, max_len: int = 900) -> str:
     """Very small heuristic to extract a pseudo-summary from raw HTML/text.
 
-    - Strips obvious script/style blocks
+    - Reduces any remaining markup to text (whole script/style blocks removed,
+      so content after them is kept)
     - Splits into sentences and keeps first ones containing target keywords
     The goal: shrink noise while retaining feasibility / trend signals.
     """
-    lowered = html.lower()
-    # Remove script/style crude blocks
-    for tag in ('<script', '<style'):
-      if tag in lowered:
-        # naive truncation at first occurrence
-        idx = lowered.find(tag)
-        html = html[:idx]
-    # Sentence split (very naive)
-    sentences = [s.strip() for s in html.replace('\n', ' ').split('.') if len(s.strip()) > 40]
-    keywords = {'ai','artificial','market','trend','adoption','challenge','regulation','risk','feasibility','startup','user','growth'}
+    text = self._html_to_text(html) if '<' in html else html
+    # Bound the work: sentences past this window could never make the excerpt anyway
+    text = text[:max_len * 4]
+    sentences: List[str] = []
     picked: List[str] = []
-    for s in sentences:
-      if any(k in s.lower() for k in keywords):
+    for raw in _SENTENCE_RE.split(text):
+      s = raw.strip()
+      if len(s) <= 40:
+        continue
+      sentences.append(s)
+      if _EXCERPT_RE.search(s):
         picked.append(s)
-      if len(picked) >= 5:
-        break
+        if len(picked) >= _EXCERPT_PICKS:
+          break
     if not picked:
       picked = sentences[:3]
-    summary = '. '.join(picked)[:max_len]
+    summary = ' '.join(picked)[:max_len]
     return summary
 
-  def _enrich_results_with_content(self, results: List[WebResult], fetch_limit: int = 5) -> None:
-    """Fetch & summarize a subset of pages to add richer grounding snippets."""
-    for r in results[:fetch_limit]:
-      started = time.perf_counter()
-      raw = self._fetch_page(r.link, max_chars=4000)
+  def _enrich_results_with_content(self, results: List[WebResult], fetch_limit: int = _CONTEXT_ENTRIES) -> None:
+    """Fetch & summarize a subset of pages to add richer grounding snippets.
+
+    Pages are fetched concurrently, so wall time is roughly the slowest fetch,
+    capped at _FETCH_FANOUT_TIMEOUT.
+    """
+    targets = results[:fetch_limit]
+    started = time.perf_counter()
+    pages = self._fan_out(lambda r: self._fetch_page(r.link, max_chars=4000), targets, _FETCH_FANOUT_TIMEOUT)
+    for r, raw in zip(targets, pages):
       if raw:
         try:
           r.content = self._lightweight_content_select(raw)
@@ -299,118 +631,46 @@ class AgentService:
     We serialize a lightweight array of objects. The prompt will instruct the
     model to treat this as read-only signals (NOT to copy verbatim).
     """
-    bundle: List[Dict[str, Any]] = []
-    for idx, r in enumerate(web_results[:5], start=1):
-      entry: Dict[str, Any] = {
+    bundle: List[Dict[str, Any]] = [
+      {
         "id": idx,
         "title": r.title[:140],
         "url": r.link,
-        "snippet": r.snippet[:300]
+        "snippet": r.snippet[:300],
+        **({"content_excerpt": r.content[:600]} if r.content else {}),
       }
-      if r.content:
-        entry["content_excerpt"] = (r.content[:600])
-      bundle.append(entry)
-    ctx = (
-      "context_bundle = " + json.dumps(bundle, ensure_ascii=False) + "\n"
-      "If context_bundle is empty, rely on general knowledge but DO NOT hallucinate unknown current statistics.\n"
-    )
+      for idx, r in enumerate(web_results[:_CONTEXT_ENTRIES], start=1)
+    ]
+    # Compact separators: whitespace inside the bundle is pure token cost
+    ctx = _format_context(bundle=orjson.dumps(bundle).decode())
     logger.debug(
       "agent.context built entries=%d chars=%d", len(bundle), len(ctx)
     )
     return ctx
 
   def _build_prompt(self, submission: IdeaSubmission, context: str) -> str:
-    """Compose the updated 2025 system prompt with the new 5 criteria.
+    """Compose the per-submission block that follows _STATIC_PROMPT.
 
     We still later back-fill legacy 10 metrics internally for compatibility,
     but the model only returns the new 5 to minimise drift / instruction load.
     """
-    return (
-      "SYSTEM ROLE\n"
-  "You are MindForge Evaluator, an impartial, context-aware judge for short (~50-word) creative AI idea pitches from college freshmen. "
-      "Your sole output is strict JSON with exactly six keys: aiRelevance, creativity, impact, clarity, funFactor, feedback. No additional commentary.\n\n"
-      "CONTEXT HANDLING\n"
-      "You may receive context_bundle containing brief, recent web snippets (lightweight search grounding).\n"
-      "- Use it ONLY to assess timeliness, feasibility, originality signals, or market alignment.\n"
-      "- If context_bundle is empty or sparse: fallback to general knowledge cautiously; NEVER hallucinate statistics or specific market sizes.\n"
-      "- Do NOT copy long passages—condense signals.\n\n"
-      f"SUBMISSION METADATA\nStudent: {submission.name}\nBranch: {submission.branch}\nRoll Number: {submission.rollNumber}\n\n"
-      "PITCH (verbatim):\n" + submission.idea + "\n\n" +
-      context + "\n"
-      "SCORING CRITERIA (0–100 integers each, evaluated INDEPENDENTLY; DO NOT average or compute a total):\n"
-      "aiRelevance & Applicability:\n"
-      "  0–39  AI irrelevant / vague / implausible.\n"
-      "  40–69 Clear but generic or partially impractical.\n"
-      "  70–89 Central & plausible with current tech.\n"
-      "  90–100 Core, technically sound, well-integrated.\n"
-      "creativity & Originality:\n"
-      "  0–39 Generic / overused.\n"
-      "  40–69 Some novelty; predictable.\n"
-      "  70–89 Fresh twist; clever adaptation.\n"
-      "  90–100 Highly original; unexpected yet sensible.\n"
-      "impact (Real-World Benefit):\n"
-      "  0–39 No clear benefit / audience.\n"
-      "  40–69 Limited or niche benefit.\n"
-      "  70–89 Significant benefit for a defined group/sector.\n"
-      "  90–100 Major potential impact; timely & relevant (context supports).\n"
-      "clarity & Presentation (target ~50 words):\n"
-      "  0–39 Confusing / incoherent.\n"
-      "  40–69 Understandable but incomplete / awkward.\n"
-      "  70–89 Clear problem + AI role + outcome.\n"
-      "  90–100 Crisp, engaging, plain language.\n"
-      "funFactor (Delight / Wow):\n"
-      "  0–39 Forgettable.\n"
-      "  40–69 Mildly interesting.\n"
-      "  70–89 Memorable & engaging.\n"
-      "  90–100 Standout; sparks excitement.\n\n"
-      "FEEDBACK REQUIREMENTS\n"
-      "- Single JSON string field (feedback) length 50–800 chars.\n"
-      "- Structure: (a) Strengths; (b) Specific improvements / next step.\n"
-      "- Be concrete (avoid 'improve scalability' without saying HOW).\n"
-      "- No bullet characters; use sentences.\n"
-      "- Do not reference score numbers explicitly.\n\n"
-      "OUTPUT FORMAT (STRICT JSON ONLY — NO MARKDOWN, NO EXTRA KEYS):\n"
-      "{\n  \"aiRelevance\": <0-100>,\n  \"creativity\": <0-100>,\n  \"impact\": <0-100>,\n  \"clarity\": <0-100>,\n  \"funFactor\": <0-100>,\n  \"feedback\": \"<50-800 chars>\"\n}\n"
-      "RULES\n"
-      "- All scores MUST be integers, no quotes.\n"
-      "- No trailing commas.\n"
-      "- Do NOT add fields (e.g., total, reasoning, confidence).\n"
-      "- If pitch severely lacks info, still score (low) and state the missing elements in feedback.\n"
+    return _format_submission(
+      name=submission.name,
+      branch=submission.branch,
+      roll=submission.rollNumber,
+      idea=submission.idea,
+      context=context,
     )
 
   def _parse_response(self, text: str) -> Dict[str, Any]:
     """Parse new-format JSON (aiRelevance, creativity, impact, clarity, funFactor, feedback)."""
-    raw = text.strip()
-    if "```json" in raw:
-      raw = raw.split("```json", 1)[1].split("```", 1)[0]
-    elif "```" in raw:
-      raw = raw.split("```", 1)[1]
-    obj = json.loads(raw)
-    required = ["aiRelevance","creativity","impact","clarity","funFactor","feedback"]
-    for k in required:
-      if k not in obj:
-        raise ValueError(f"Missing key {k}")
-    def clamp(v: Any) -> int:
-      return max(0, min(100, int(v)))
-    ai_rel = clamp(obj['aiRelevance'])
-    creativity = clamp(obj['creativity'])
-    impact = clamp(obj['impact'])
-    clarity = clamp(obj['clarity'])
-    fun = clamp(obj['funFactor'])
-    feedback = obj.get('feedback','') or ''
-    if len(feedback) < 50:
-      raise ValueError('Feedback too short')
-    total = max(0, min(100, round((ai_rel + creativity + impact + clarity + fun)/5)))
-    return {
-      'aiRelevance': ai_rel,
-      'creativity': creativity,
-      'impact': impact,
-      'clarity': clarity,
-      'funFactor': fun,
-      'totalScore': total,
-      'feedback': feedback,
-      'evaluatedAt': datetime.now(timezone.utc).isoformat()
-    }
+    fenced = _FENCE_RE.search(text)
+    # The stream is cut once the object closes, so a closing fence or END marker may be partial
+    raw = first_json_object(fenced.group(1) if fenced else text)
+    # Missing keys / short feedback raise ValidationError (a ValueError)
+    result = ModelScores.model_validate_json(raw).with_total()
+    result['evaluatedAt'] = datetime.now(timezone.utc).isoformat()
+    return result
   
   # -----------------------
   # Main flow
@@ -433,21 +693,26 @@ class AgentService:
       logger.debug("agent.pipeline no_cse_keys uid=%s", submission.uid)
       return self._build_prompt(submission, "context_bundle = []\n")
 
+    # Cheap gate before any I/O: near-empty or non-idea pitches skip the search fan-out
+    core_terms = self._extract_core_terms(submission.idea)
+    domain = self._infer_domain(core_terms)
+    if len(core_terms) < _MIN_SEARCH_TERMS or (domain is None and len(core_terms) < _MIN_SEARCH_TERMS_NO_DOMAIN):
+      logger.debug("agent.pipeline skip_retrieval uid=%s terms=%d domain=%s", submission.uid, len(core_terms), domain)
+      return self._build_prompt(submission, "context_bundle = []\n")
+
     pipeline_start = time.perf_counter()
     try:
       base_query = self._build_base_query(submission)
-      core_terms = self._extract_core_terms(submission.idea)
-      domain = self._infer_domain(core_terms)
       query_variants = self._generate_query_variants(base_query, core_terms, domain)
       merged_results = self._aggregate_search(query_variants)
-      self._enrich_results_with_content(merged_results, fetch_limit=5)
+      self._enrich_results_with_content(merged_results)
       context = self._build_context(merged_results)
       logger.debug(
         "agent.pipeline success uid=%s variants=%d results=%d elapsed_ms=%.1f", submission.uid, len(query_variants), len(merged_results), (time.perf_counter()-pipeline_start)*1000
       )
       return self._build_prompt(submission, context)
     except Exception as e:  # noqa: BLE001
-      logger.warning(f"Context enrichment failed; using fallback simple search. Error: {e}")
+      logger.warning("Context enrichment failed; using fallback simple search. Error: %s", e)
       # Fallback: single-step basic search (previous simpler path)
       base_query = self._build_base_query(submission)
       initial_results = self._search_web(base_query)
@@ -460,7 +725,8 @@ class AgentService:
 
   def _build_base_query(self, submission: IdeaSubmission) -> str:
     seed_terms = ["market trends", "competitors", "feasibility", "customer adoption"]
-    return f"{submission.idea[:160].replace('\n',' ')} {' '.join(seed_terms)}"
+    idea_head = submission.idea[:160].replace('\n', ' ')
+    return f"{idea_head} {' '.join(seed_terms)}"
 
   def _maybe_refine_and_merge(self, base_query: str, initial: List[WebResult]) -> List[WebResult]:
     if not initial:
@@ -486,8 +752,9 @@ class AgentService:
     return merged
 
   def _fetch_top_contents(self, results: List[WebResult], limit: int = 3) -> None:
-    for r in results[:limit]:
-      r.content = self._fetch_page(r.link)
+    targets = results[:limit]
+    for r, content in zip(targets, self._fan_out(lambda r: self._fetch_page(r.link), targets, _FETCH_FANOUT_TIMEOUT)):
+      r.content = content
 
   def _extract_json_segment(self, text: str) -> str:
     if 'JSON_RESPONSE:' in text:
@@ -507,18 +774,26 @@ class AgentService:
       return None
 
     eval_start = time.perf_counter()
+    cached, idea_vec = self._semantic_cache.lookup(submission.idea)
+    if cached:
+      cached['evaluatedAt'] = datetime.now(timezone.utc).isoformat()
+      logger.info(
+        "agent.evaluate cache_hit uid=%s score=%d elapsed_ms=%.1f", submission.uid, cached['totalScore'], (time.perf_counter()-eval_start)*1000
+      )
+      return EvaluationResponse(**cached)
+
     prompt = self._prepare_prompt_with_context(submission)
-    analysis_prompt = self._compose_analysis_prompt(prompt)
     logger.debug(
-      "agent.evaluate prompt_built uid=%s chars=%d", submission.uid, len(analysis_prompt)
+      "agent.evaluate prompt_built uid=%s chars=%d", submission.uid, len(_STATIC_PROMPT) + len(prompt)
     )
 
     try:
-      text = self._generate_text(analysis_prompt)
+      text = self._generate_text(prompt)
       if not text:
         raise ValueError("Empty LLM response")
       json_payload = self._extract_json_segment(text)
       data = self._parse_response(json_payload)
+      self._semantic_cache.store(submission.idea, data, idea_vec)
       elapsed_ms = (time.perf_counter() - eval_start) * 1000
       logger.info(
         "agent.evaluate success uid=%s score=%d elapsed_ms=%.1f", submission.uid, data['totalScore'], elapsed_ms
@@ -531,38 +806,79 @@ class AgentService:
       )
       return None
 
+  async def evaluate_async(self, submission: IdeaSubmission) -> Optional[EvaluationResponse]:
+    """evaluate() on a worker thread, so its blocking search/fetch/Gemini calls
+    never stall the event loop."""
+    return await asyncio.to_thread(self.evaluate, submission)
+
+  async def evaluate_many(
+    self, submissions: List[IdeaSubmission], concurrency: Optional[int] = None
+  ) -> List[Optional[EvaluationResponse]]:
+    """Evaluate a batch of submissions with at most `concurrency` in flight.
+
+    Each evaluate() runs in a worker thread so their network waits overlap; results
+    come back in input order, with None where evaluation was unavailable or failed.
+    `concurrency` defaults to settings.GEMINI_MAX_CONCURRENCY; keep it at or below
+    what the configured keys' rate limits allow.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency or settings.GEMINI_MAX_CONCURRENCY))
+
+    async def _one(sub: IdeaSubmission) -> Optional[EvaluationResponse]:
+      async with sem:
+        return await self.evaluate_async(sub)
+
+    return list(await asyncio.gather(*(_one(s) for s in submissions)))
+
   # -----------------------
   # Internal helpers (generation)
   # -----------------------
-  def _compose_analysis_prompt(self, base_prompt: str) -> str:
-    # Retain an internal ANALYSIS phase for reasoning transparency while keeping
-    # final JSON minimal. The parser strips wrapper markers.
-    return (
-      base_prompt +
-      "\nThink briefly before answering. Return exactly two blocks in order:\n"
-      "ANALYSIS:\n<bullet list of 3-7 grounded insight bullets WITHOUT referencing source ids if used like [1],[2]>\nEND_ANALYSIS\n"
-      "JSON_RESPONSE:\n<ONLY the specified JSON schema with 5 keys + feedback>\nEND_JSON_RESPONSE"
-    )
+  def _embed(self, text: str) -> List[float]:
+    if self.multi_client:
+      return self.multi_client.embed(text)
+    import google.generativeai as genai
+
+    return genai.embed_content(
+      model='models/text-embedding-004', content=text, task_type="semantic_similarity"
+    )["embedding"]
+
+  @staticmethod
+  def _json_block_complete(text: str) -> bool:
+    """True once the JSON_RESPONSE object has closed (anything after it is unused)."""
+    marker = text.find('JSON_RESPONSE:')
+    return marker >= 0 and json_object_end(text, marker) >= 0
+
+  @classmethod
+  def _stream_done(cls, text: str) -> bool:
+    """Stop once the JSON object has closed, or once the output is too long to be valid."""
+    return len(text) > _MAX_RESPONSE_CHARS or cls._json_block_complete(text)
 
   def _generate_text(self, prompt: str) -> Optional[str]:
-    if self.multi_client:
-      resp = self.multi_client.generate(prompt)
-      return self.multi_client.extract_text(resp)
-    # single-key path
-    resp = self.model.generate_content(prompt)  # type: ignore[union-attr]
-    text = getattr(resp, 'text', None)
-    if text:
-      return text
-    try:
-      candidates = getattr(resp, 'candidates', [])
-      if candidates:
-        parts = getattr(candidates[0].content, 'parts', [])
-        if parts and hasattr(parts[0], 'text'):
-          return parts[0].text
-    except Exception:  # noqa: BLE001
-      return None
-    return None
+    """Generate from _STATIC_PROMPT + the per-submission prompt.
+
+    Output is streamed and reading stops as soon as the JSON_RESPONSE object is
+    complete, so we never wait on the trailer after it; runaway output is cut
+    off at _MAX_RESPONSE_CHARS.
+    """
+    def _start():
+      if self.multi_client:
+        return self.multi_client.generate(_STATIC_PROMPT + prompt, stream=True)
+      return self.model.generate_content(_STATIC_PROMPT + prompt, stream=True)  # type: ignore[union-attr]
+
+    # A transient 429/5xx gets a couple of quick retries before evaluate() falls back
+    resp = with_retry(_start, label="agent.generate")
+    return read_stream(resp, until=self._stream_done) or None
+
+@lru_cache(maxsize=1)
+def get_agent_service() -> AgentService:
+  """Return the process-wide AgentService, creating it on first use.
+
+  Construction configures Gemini and starts the background warmup.
+  """
+  return AgentService()
 
 
-# Singleton instance
-agent_service = AgentService()
+def __getattr__(name):
+  # Keeps `from .agent_service import agent_service` working without building it at import
+  if name == "agent_service":
+    return get_agent_service()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,129 +1,320 @@
-import google.generativeai as genai
-import json
+import asyncio
+import hashlib
 import logging
+import orjson
+import re
+import threading
 import time
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+from cachetools import TTLCache
 from ..core.config import settings
-from ..models.schemas import IdeaSubmission, EvaluationResponse
+from ..models.schemas import IdeaSubmission, EvaluationResponse, ModelScores
 from datetime import datetime, timezone
-from .gemini_client import GeminiMultiKeyClient
+from .gemini_client import GeminiBase, first_json_object, json_object_end, read_stream
+from .redis_client import KEY_PREFIX, get_redis
+from .retry import CircuitBreaker, is_transient, with_retry
+from .semantic_cache import get_shared_semantic_cache
 
 logger = logging.getLogger(__name__)
 
-class AIService:
+_MODEL_NAME = 'gemini-2.5-flash'
+# Bump when the prompt, generation config or parsing changes so cached
+# evaluations are not reused
+_PROMPT_VERSION = "6"
+# Identical (normalised) pitches reuse a recent evaluation instead of calling Gemini
+_RESULT_CACHE_SIZE = 10_000
+_RESULT_CACHE_TTL = 24 * 3600
+# Same entries in the optional shared Redis cache, under this key prefix
+_SHARED_KEY = KEY_PREFIX + "ai_eval:"
+_WS_RE = re.compile(r"\s+")
+# After this many consecutive transient Gemini failures, skip straight to the
+# synthetic fallback for the cooldown instead of retrying into an outage
+_BREAKER_THRESHOLD = 5
+_BREAKER_COOLDOWN = 30.0
+# The five scored criteria, in rubric order
+_SCORE_FIELDS = ('aiRelevance', 'creativity', 'impact', 'clarity', 'funFactor')
+# Synthetic fallback: per-criterion (modulus, offset) jitter around a length-based
+# base score, aligned with _SCORE_FIELDS
+_FALLBACK_JITTER = ((7, 3), (11, 5), (13, 4), (5, 2), (9, 4))
+_FALLBACK_FEEDBACK = (
+    "Synthetic fallback: refine specificity, highlight AI differentiator, "
+    "and quantify who benefits to improve impact & clarity."
+)
+
+# Static part of the evaluation prompt (identity, rubric, output format). It is
+# identical for every request and sent first, so only the short per-submission
+# tail varies and Gemini's implicit prefix caching can reuse it. Like the agent's
+# rubric it is below the minimum size for an explicit CachedContent, so neither
+# service creates one. JSON mode + _RESPONSE_SCHEMA enforce the reply's syntax and keys,
+# so the prompt carries no formatting rules beyond the field layout.
+_PROMPT_PREFIX = (
+    "You are MindForge Evaluator, an impartial judge for short (~50-word) creative AI idea pitches from college freshmen. "
+    "Do NOT include a total or any extra keys.\n\n"
+    "IDENTITY & SCOPE\n"
+    "- Be concise, analytical, and consistent with the rubric below.\n"
+    "- Never hallucinate facts or statistics; if uncertain, evaluate based on the text quality itself.\n\n"
+    "RUBRIC (0–100 integers, evaluate EACH independently; DO NOT average or compute total):\n"
+    "aiRelevance & Applicability:\n"
+    "  0–39  AI absent / irrelevant / implausible.\n"
+    "  40–69 AI role present but generic OR partially impractical.\n"
+    "  70–89 AI is central, plausible with current tech.\n"
+    "  90–100 AI is core, technically sound, well-integrated.\n"
+    "creativity & Originality:\n"
+    "  0–39  Generic / overused pattern.\n"
+    "  40–69 Some novelty but predictable.\n"
+    "  70–89 Fresh twist; clever adaptation.\n"
+    "  90–100 Highly original; unexpected yet sensible.\n"
+    "impact (Real-World Benefit):\n"
+    "  0–39  No clear benefit / audience.\n"
+    "  40–69 Limited or niche value.\n"
+    "  70–89 Significant benefit for a defined group/sector.\n"
+    "  90–100 Major potential impact; timely / relevant.\n"
+    "clarity & Presentation (target length ~50 words):\n"
+    "  0–39  Confusing or incoherent.\n"
+    "  40–69 Understandable but incomplete / awkward.\n"
+    "  70–89 Clear problem + AI role + outcome.\n"
+    "  90–100 Crisp, engaging, plain language.\n"
+    "funFactor (Delight / Wow):\n"
+    "  0–39  Forgettable.\n"
+    "  40–69 Mildly interesting.\n"
+    "  70–89 Memorable & engaging.\n"
+    "  90–100 Standout; sparks excitement.\n\n"
+    "FEEDBACK REQUIREMENTS\n"
+    "- Provide a single string 50–800 chars.\n"
+    "- Structure: (a) Strengths / what's working; (b) Specific improvements / next step.\n"
+    "- Be actionable (avoid generic 'be more innovative').\n"
+    "- Avoid repeating the pitch verbatim; summarise.\n\n"
+    "OUTPUT FORMAT:\n"
+    "{\n  \"aiRelevance\": <0-100>,\n  \"creativity\": <0-100>,\n  \"impact\": <0-100>,\n  \"clarity\": <0-100>,\n  \"funFactor\": <0-100>,\n  \"feedback\": \"<50-800 chars>\"\n}\n"
+)
+
+
+# Per-submission tail, formatted from a template parsed once at import
+_format_submission = (
+    "\nSUBMISSION METADATA\nStudent: {name}\nBranch: {branch}\nRoll Number: {roll}\n\n"
+    "PITCH (verbatim user text):\n{idea}\n"
+).format
+
+# Constrained decoding: Gemini must return exactly this JSON object, so replies
+# carry no Markdown fences or prose and always have every field
+_RESPONSE_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        **{field: {'type': 'integer'} for field in _SCORE_FIELDS},
+        'feedback': {'type': 'string'},
+    },
+    'required': [*_SCORE_FIELDS, 'feedback'],
+}
+# Low temperature keeps scoring consistent (and repeat pitches cacheable). The
+# reply itself is ~300 tokens, but 2.5 Flash counts its thinking tokens against
+# max_output_tokens, so the cap only guards against runaway output. Plain dicts
+# (accepted wherever the SDK takes a GenerationConfig) keep the SDK import lazy.
+_GENERATION_CONFIG = {
+    'temperature': 0.2,
+    'top_p': 0.9,
+    'max_output_tokens': 2048,
+    'response_mime_type': 'application/json',
+    'response_schema': _RESPONSE_SCHEMA,
+}
+
+
+# Batch mode: several pitches share one call (rubric sent once) and the model
+# returns an array of the same objects, in pitch order
+_BATCH_SIZE = 8
+_format_batch_header = (
+    "\nBATCH MODE\nThe {count} pitches below are independent submissions. Score each one on its own "
+    "with the rubric above and return a JSON array of exactly {count} objects in the OUTPUT FORMAT above, "
+    "one per pitch, in the order given.\n"
+).format
+_format_batch_item = (
+    "\nPITCH {n}\nStudent: {name}\nBranch: {branch}\nRoll Number: {roll}\nText (verbatim):\n{idea}\n"
+).format
+_BATCH_GENERATION_CONFIG = {
+    **_GENERATION_CONFIG,
+    'max_output_tokens': 2048 * _BATCH_SIZE,
+    'response_schema': {'type': 'array', 'items': _RESPONSE_SCHEMA},
+}
+
+
+def _now_iso() -> str:
+    """evaluatedAt stamp: UTC ISO-8601 to the second (sub-second precision is never read)."""
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _json_complete(text: str) -> bool:
+    return json_object_end(text) >= 0
+
+
+class AIService(GeminiBase):
     """Service for AI-powered idea evaluation using Gemini"""
     
     def __init__(self):
-        self._initialize_genai()
+        self._initialize_genai(_MODEL_NAME, generation_config=_GENERATION_CONFIG)
+        self._result_cache: TTLCache = TTLCache(maxsize=_RESULT_CACHE_SIZE, ttl=_RESULT_CACHE_TTL)
+        self._result_lock = threading.Lock()
+        self._breaker = CircuitBreaker(_BREAKER_THRESHOLD, _BREAKER_COOLDOWN, label="ai_eval.circuit")
+        # Paraphrased pitches (embedding cosine >= threshold) reuse a stored evaluation
+        # (one process-wide cache, shared with AgentService)
+        self._semantic_cache = get_shared_semantic_cache(
+            self._embed,
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL,
+        )
+
+    def _embed(self, text: str):
+        if self.multi_client:
+            return self.multi_client.embed(text)
+        import google.generativeai as genai
+
+        return genai.embed_content(
+            model='models/text-embedding-004', content=text, task_type="semantic_similarity"
+        )["embedding"]
+
+    @staticmethod
+    def _cache_key(submission: IdeaSubmission) -> str:
+        """Hash of the inputs that determine an evaluation (case/whitespace-insensitive)."""
+        idea = _WS_RE.sub(' ', submission.idea.lower()).strip()
+        branch = _WS_RE.sub(' ', submission.branch.lower()).strip()
+        raw = f"{_PROMPT_VERSION}|{_MODEL_NAME}|{branch}|{idea}"
+        return hashlib.sha256(raw.encode()).hexdigest()
     
-    def _initialize_genai(self) -> None:
-        """Initialize Google Generative AI (multi-key if provided)."""
+    def _cached_evaluation(
+        self, submission: IdeaSubmission, cache_key: str, t0: float
+    ) -> Tuple[Optional[EvaluationResponse], Optional[Tuple[float, ...]]]:
+        """Exact (local, then shared) and semantic cache lookups.
+
+        Returns (hit or None, the idea's embedding from the semantic lookup or None);
+        the embedding is passed on to _remember so it is computed only once.
+        """
+        with self._result_lock:
+            cached = self._result_cache.get(cache_key)
+        if cached is None:
+            cached = self._shared_get(cache_key)
+        if cached is not None:
+            logger.info(
+                "ai_eval.cache_hit uid=%s score=%d elapsed_ms=%.1f",
+                submission.uid,
+                cached.totalScore,
+                (time.perf_counter() - t0) * 1000,
+            )
+            return cached.model_copy(update={'evaluatedAt': _now_iso()}), None
+
+        # Second tier: near-duplicate pitches (costs one embedding call, not a generation)
+        if not (self.model or self.multi_client):
+            return None, None
+        similar, idea_vec = self._semantic_cache.lookup(submission.idea)
+        if similar:
+            similar['evaluatedAt'] = _now_iso()
+            logger.info(
+                "ai_eval.semantic_hit uid=%s score=%d elapsed_ms=%.1f",
+                submission.uid,
+                similar['totalScore'],
+                (time.perf_counter() - t0) * 1000,
+            )
+            return EvaluationResponse(**similar), idea_vec
+        return None, idea_vec
+
+    def _remember(
+        self,
+        submission: IdeaSubmission,
+        cache_key: str,
+        evaluation_data: Dict[str, Any],
+        evaluation: EvaluationResponse,
+        idea_vec: Optional[Tuple[float, ...]],
+    ) -> None:
+        """Store a model-produced evaluation in every cache tier."""
+        # Only real model output is cached; the synthetic fallback never is
+        with self._result_lock:
+            self._result_cache[cache_key] = evaluation
+        self._semantic_cache.store(submission.idea, evaluation_data, idea_vec)
+        self._shared_put(cache_key, evaluation)
+
+    def _generate_text(self, prompt: str, generation_config=None, until=None) -> str:
+        """Streamed Gemini call (multi-key if available) behind the circuit breaker.
+
+        Transient 429/5xx get a couple of jittered retries, and a run of them opens
+        the breaker. `generation_config` overrides the model default for this call.
+        """
+        if not (getattr(self, 'multi_client', None) or getattr(self, 'model', None)):
+            raise RuntimeError("AI model not initialized")
+        if not self._breaker.allow():
+            raise RuntimeError("Gemini circuit open")
         try:
-            if settings.GEMINI_API_KEYS:
-                self.multi_client = GeminiMultiKeyClient(settings.GEMINI_API_KEYS, 'gemini-2.5-flash')
-                self.model = None
-                logger.info("AIService using GeminiMultiKeyClient (round-robin keys)")
+            if self.multi_client:
+                response = with_retry(
+                    lambda: self.multi_client.generate(prompt, stream=True, generation_config=generation_config),
+                    label="ai_eval.generate",
+                )
             else:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                # Prefer a current, fast model for structured JSON output
-                self.model = genai.GenerativeModel('gemini-2.5-flash')
-                self.multi_client = None
-                logger.info("Gemini AI initialized successfully (single key)")
+                response = with_retry(
+                    lambda: self.model.generate_content(prompt, stream=True, generation_config=generation_config),
+                    label="ai_eval.generate",
+                )
+            text = read_stream(response, until=until)
+            self._breaker.record_success()
         except Exception as e:
-            # Don't crash the app if AI init fails; allow fallback in evaluate_idea
-            self.model = None
-            self.multi_client = None
-            logger.warning(f"Gemini AI initialization failed; using fallback evaluation. Error: {e}")
-    
-    def _create_evaluation_prompt(self, submission: IdeaSubmission) -> str:
-        # Expanded, highly instructive rubric-driven system prompt.
-        # NOTE: The downstream parser expects ONLY the 5 numeric criteria + feedback.
-        # The model MUST NOT add a totalScore or any extra fields.
-        return (
-            "You are MindForge Evaluator, an impartial judge for short (~50-word) creative AI idea pitches from college freshmen. "
-            "Return ONLY raw JSON (no Markdown fence, no commentary before/after). Do NOT include a total or any extra keys.\n\n"
-            "IDENTITY & SCOPE\n"
-            "- Be concise, analytical, and consistent with the rubric below.\n"
-            "- Never hallucinate facts or statistics; if uncertain, evaluate based on the text quality itself.\n\n"
-            f"SUBMISSION METADATA\nStudent: {submission.name}\nBranch: {submission.branch}\nRoll Number: {submission.rollNumber}\n\n"
-            f"PITCH (verbatim user text):\n{submission.idea}\n\n"
-            "RUBRIC (0–100 integers, evaluate EACH independently; DO NOT average or compute total):\n"
-            "aiRelevance & Applicability:\n"
-            "  0–39  AI absent / irrelevant / implausible.\n"
-            "  40–69 AI role present but generic OR partially impractical.\n"
-            "  70–89 AI is central, plausible with current tech.\n"
-            "  90–100 AI is core, technically sound, well-integrated.\n"
-            "creativity & Originality:\n"
-            "  0–39  Generic / overused pattern.\n"
-            "  40–69 Some novelty but predictable.\n"
-            "  70–89 Fresh twist; clever adaptation.\n"
-            "  90–100 Highly original; unexpected yet sensible.\n"
-            "impact (Real-World Benefit):\n"
-            "  0–39  No clear benefit / audience.\n"
-            "  40–69 Limited or niche value.\n"
-            "  70–89 Significant benefit for a defined group/sector.\n"
-            "  90–100 Major potential impact; timely / relevant.\n"
-            "clarity & Presentation (target length ~50 words):\n"
-            "  0–39  Confusing or incoherent.\n"
-            "  40–69 Understandable but incomplete / awkward.\n"
-            "  70–89 Clear problem + AI role + outcome.\n"
-            "  90–100 Crisp, engaging, plain language.\n"
-            "funFactor (Delight / Wow):\n"
-            "  0–39  Forgettable.\n"
-            "  40–69 Mildly interesting.\n"
-            "  70–89 Memorable & engaging.\n"
-            "  90–100 Standout; sparks excitement.\n\n"
-            "FEEDBACK REQUIREMENTS\n"
-            "- Provide a single string 50–800 chars.\n"
-            "- Structure: (a) Strengths / what's working; (b) Specific improvements / next step.\n"
-            "- Be actionable (avoid generic 'be more innovative').\n"
-            "- Avoid repeating the pitch verbatim; summarise.\n\n"
-            "OUTPUT FORMAT (STRICT JSON ONLY — NO MARKDOWN):\n"
-            "{\n  \"aiRelevance\": <0-100>,\n  \"creativity\": <0-100>,\n  \"impact\": <0-100>,\n  \"clarity\": <0-100>,\n  \"funFactor\": <0-100>,\n  \"feedback\": \"<50-800 chars>\"\n}\n"
-            "RULES\n"
-            "- No backticks, no trailing commas, no additional keys.\n"
-            "- All scores MUST be integers.\n"
-            "- Do NOT include explanations outside JSON.\n"
-        )
+            if is_transient(e):
+                self._breaker.record_failure()
+            raise
+        finally:
+            # Non-transient errors say nothing about provider health; just end a half-open trial
+            self._breaker.release()
+        return text
 
-    @staticmethod
-    def _extract_text_single(response) -> Optional[str]:
-        """Extract text from single-key response variants."""
-        text = getattr(response, "text", None)
-        if text:
-            return text
+    def _shared_get(self, cache_key: str) -> Optional[EvaluationResponse]:
+        """Look the key up in the shared Redis cache (if configured); errors count as a miss."""
+        client = get_redis()
+        if client is None:
+            return None
         try:
-            candidates = getattr(response, "candidates", [])
-            if candidates:
-                parts = getattr(candidates[0].content, "parts", [])
-                if parts and hasattr(parts[0], "text"):
-                    return parts[0].text
-        except Exception:
+            blob = client.get(_SHARED_KEY + cache_key)
+        except Exception as e:  # noqa: BLE001
+            logger.debug("ai_eval.shared_cache get failed: %s", e)
             return None
-        return None
+        if not blob:
+            return None
+        try:
+            cached = EvaluationResponse.model_validate_json(blob)
+        except ValueError:
+            return None
+        with self._result_lock:
+            self._result_cache[cache_key] = cached
+        return cached
+
+    def _shared_put(self, cache_key: str, evaluation: EvaluationResponse) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.setex(_SHARED_KEY + cache_key, _RESULT_CACHE_TTL, evaluation.model_dump_json())
+        except Exception as e:  # noqa: BLE001
+            logger.debug("ai_eval.shared_cache put failed: %s", e)
+
+    def _create_evaluation_prompt(self, submission: IdeaSubmission) -> str:
+        # Static rubric first, then the submission-specific tail
+        return _PROMPT_PREFIX + _format_submission(
+            name=submission.name,
+            branch=submission.branch,
+            roll=submission.rollNumber,
+            idea=submission.idea,
+        )
 
     @staticmethod
     def _fallback_synthetic(submission: IdeaSubmission) -> EvaluationResponse:
         idea_len = len(submission.idea or '')
         base = max(15, min(70, idea_len // 25 + 15))
-        def clamp(v):
-            return max(0, min(100, v))
-        ai_rel = clamp(base + (idea_len % 7) - 3)
-        creativity = clamp(base + (idea_len % 11) - 5)
-        impact = clamp(base + (idea_len % 13) - 4)
-        clarity = clamp(base + (idea_len % 5) - 2)
-        fun = clamp(base + (idea_len % 9) - 4)
-        total = clamp(round((ai_rel + creativity + impact + clarity + fun)/5))
-        feedback_text = "Synthetic fallback: refine specificity, highlight AI differentiator, and quantify who benefits to improve impact & clarity."
+        scores = {
+            field: max(0, min(100, base + idea_len % modulus - offset))
+            for field, (modulus, offset) in zip(_SCORE_FIELDS, _FALLBACK_JITTER)
+        }
+        # Integer round-half-up of the mean; scores are already within 0..100
+        total = (sum(scores.values()) + 2) // 5
         return EvaluationResponse(
-            aiRelevance=ai_rel,
-            creativity=creativity,
-            impact=impact,
-            clarity=clarity,
-            funFactor=fun,
+            **scores,
             totalScore=total,
-            feedback=feedback_text,
-            evaluatedAt=datetime.now(timezone.utc).isoformat(),
+            feedback=_FALLBACK_FEEDBACK,
+            evaluatedAt=_now_iso(),
         )
     
     def _parse_ai_response(self, response_text: str) -> Dict[str, Any]:
@@ -140,63 +331,27 @@ class AIService:
             ValueError: If response cannot be parsed or is invalid
         """
         try:
-            # Clean the response text
-            evaluation_text = response_text.strip()
-            
-            # Handle markdown formatting
-            if "```json" in evaluation_text:
-                evaluation_text = evaluation_text.split("```json")[1].split("```")[0]
-            elif "```" in evaluation_text:
-                evaluation_text = evaluation_text.split("```")[1]
-            
-            # Parse JSON
-            evaluation_data = json.loads(evaluation_text.strip())
-            
-            # Validate required fields
-            required_fields = [
-                'aiRelevance','creativity','impact','clarity','funFactor','feedback'
-            ]
-            for field in required_fields:
-                if field not in evaluation_data:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            # Validate score ranges for all criteria (1-100)
-            for score_field in [
-                'aiRelevance','creativity','impact','clarity','funFactor'
-            ]:
-                score_raw = evaluation_data[score_field]
-                try:
-                    score = int(score_raw)
-                except Exception:
-                    raise ValueError(f"Invalid score for {score_field}: {score_raw}")
-                # Clamp to valid bounds
-                score = max(1, min(100, score))
-                evaluation_data[score_field] = score
-            
-            # Calculate and validate total score (average of criteria)
-            total_sum = sum([
-                evaluation_data['aiRelevance'], evaluation_data['creativity'], evaluation_data['impact'],
-                evaluation_data['clarity'], evaluation_data['funFactor']
-            ])
-            total_score = round(total_sum / 5)
-            total_score = max(1, min(100, total_score))
-            evaluation_data['totalScore'] = total_score
-            
-            # Validate feedback
-            if not isinstance(evaluation_data['feedback'], str) or len(evaluation_data['feedback']) < 50:
-                raise ValueError("Feedback must be a string with at least 50 characters")
-            
-            # Add evaluatedAt timestamp
-            evaluation_data['evaluatedAt'] = datetime.now(timezone.utc).isoformat()
+            # JSON mode: the reply is the bare object, parsed and validated in one pass.
+            # The stream stops once it closes, so drop anything read past it
+            return self._finish_evaluation(ModelScores.model_validate_json(first_json_object(response_text)))
+        except ValueError as e:
+            logger.error("Error parsing AI response: %s", e)
+            raise ValueError(f"Failed to parse AI response: {e}")
 
-            return evaluation_data
+    def _validate_evaluation(self, evaluation_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate one already-parsed evaluation object (e.g. a batch item).
 
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse AI response as JSON: {e}")
-            raise ValueError("Invalid JSON response from AI")
-        except Exception as e:
-            logger.error(f"Error parsing AI response: {e}")
-            raise ValueError(f"Failed to parse AI response: {str(e)}")
+        Raises:
+            ValueError: If the object is incomplete or invalid
+        """
+        return self._finish_evaluation(ModelScores.model_validate(evaluation_data))
+
+    @staticmethod
+    def _finish_evaluation(scores: ModelScores) -> Dict[str, Any]:
+        """Evaluation data for a validated reply: clamped criteria, feedback, totalScore, evaluatedAt."""
+        evaluation_data = scores.with_total()
+        evaluation_data['evaluatedAt'] = _now_iso()
+        return evaluation_data
     
     def evaluate_idea(self, submission: IdeaSubmission) -> Optional[EvaluationResponse]:
         """
@@ -208,44 +363,51 @@ class AIService:
         Returns:
             EvaluationResponse: The evaluation results or None if failed
         """
+        t0 = time.perf_counter()
+        cache_key = self._cache_key(submission)
+        cached, idea_vec = self._cached_evaluation(submission, cache_key, t0)
+        if cached is not None:
+            return cached
+
         try:
-            t0 = time.perf_counter()
-            idea_preview = (submission.idea[:140] + '…') if len(submission.idea) > 140 else submission.idea
             logger.info(
-                "ai_eval.start uid=%s name=%s idea_chars=%d preview=%r multi_client=%s",
+                "ai_eval.start uid=%s name=%s idea_chars=%d multi_client=%s",
                 submission.uid,
                 submission.name,
                 len(submission.idea),
-                idea_preview,
                 bool(getattr(self, 'multi_client', None)),
             )
 
             # Create prompt
             prompt = self._create_evaluation_prompt(submission)
-            logger.debug(
-                "ai_eval.prompt uid=%s prompt_chars=%d prompt_first_line=%r", submission.uid, len(prompt), prompt.splitlines()[0][:120]
-            )
+            # Previews are sliced only when debug logging is on
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug(
+                    "ai_eval.prompt uid=%s prompt_chars=%d preview=%r",
+                    submission.uid,
+                    len(prompt),
+                    (submission.idea[:140] + '…') if len(submission.idea) > 140 else submission.idea,
+                )
 
-            # Get AI response (use multi-key if available)
-            if getattr(self, 'multi_client', None):
-                response = self.multi_client.generate(prompt)
-                text = self.multi_client.extract_text(response)
-            else:
-                if not getattr(self, 'model', None):
-                    raise RuntimeError("AI model not initialized")
-                response = self.model.generate_content(prompt)
-                text = self._extract_text_single(response)
+            # Streamed: stop reading as soon as the JSON object closes
+            text = self._generate_text(prompt, until=_json_complete)
             if not text:
                 raise ValueError("Empty response from AI")
-            logger.debug(
-                "ai_eval.response_raw uid=%s chars=%d head=%r", submission.uid, len(text), text[:180].replace('\n',' ') + ("…" if len(text) > 180 else "")
-            )
+            if debug:
+                logger.debug(
+                    "ai_eval.response_raw uid=%s chars=%d head=%r",
+                    submission.uid,
+                    len(text),
+                    text[:180].replace('\n', ' ') + ("…" if len(text) > 180 else ""),
+                )
 
             # Parse response
             evaluation_data = self._parse_ai_response(text)
 
             # Create response model
             evaluation_response = EvaluationResponse(**evaluation_data)
+            self._remember(submission, cache_key, evaluation_data, evaluation_response, idea_vec)
 
             elapsed_ms = (time.perf_counter() - t0) * 1000
             logger.info(
@@ -267,5 +429,100 @@ class AIService:
             )
             return fallback
 
-# Create singleton instance
-ai_service = AIService()
+    def evaluate_batch(self, submissions: List[IdeaSubmission]) -> List[EvaluationResponse]:
+        """Evaluate several pitches with a single Gemini call.
+
+        Cache hits are answered first; the remaining pitches share one prompt
+        (rubric once, pitches numbered) and the model returns a JSON array in the
+        same order. An item that is missing or invalid gets the synthetic
+        fallback, as does every item if the call itself fails.
+        """
+        t0 = time.perf_counter()
+        results: List[Optional[EvaluationResponse]] = [None] * len(submissions)
+        pending = []  # (index, cache_key, idea_vec) of cache misses
+        for i, sub in enumerate(submissions):
+            cache_key = self._cache_key(sub)
+            cached, idea_vec = self._cached_evaluation(sub, cache_key, t0)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, cache_key, idea_vec))
+        if not pending:
+            return results
+
+        items: List[Any] = []
+        try:
+            prompt = _PROMPT_PREFIX + _format_batch_header(count=len(pending)) + ''.join(
+                _format_batch_item(
+                    n=n,
+                    name=submissions[i].name,
+                    branch=submissions[i].branch,
+                    roll=submissions[i].rollNumber,
+                    idea=submissions[i].idea,
+                )
+                for n, (i, _, _) in enumerate(pending, 1)
+            )
+            text = self._generate_text(prompt, generation_config=_BATCH_GENERATION_CONFIG)
+            items = orjson.loads(text or '')
+            if not isinstance(items, list):
+                raise ValueError("Batch reply is not a JSON array")
+        except Exception as e:
+            items = []
+            logger.warning("ai_eval.batch_failure size=%d error=%s -> using synthetic fallback", len(pending), e)
+
+        generated = 0
+        for n, (i, cache_key, idea_vec) in enumerate(pending):
+            sub = submissions[i]
+            try:
+                evaluation_data = self._validate_evaluation(dict(items[n]))
+                results[i] = EvaluationResponse(**evaluation_data)
+                self._remember(sub, cache_key, evaluation_data, results[i], idea_vec)
+                generated += 1
+            except Exception as e:  # noqa: BLE001
+                if items:
+                    logger.warning("ai_eval.batch_item_invalid uid=%s error=%s -> using synthetic fallback", sub.uid, e)
+                results[i] = self._fallback_synthetic(sub)
+        logger.info(
+            "ai_eval.batch size=%d cached=%d generated=%d elapsed_ms=%.1f",
+            len(submissions),
+            len(submissions) - len(pending),
+            generated,
+            (time.perf_counter() - t0) * 1000,
+        )
+        return results
+
+    async def evaluate_idea_async(self, submission: IdeaSubmission) -> Optional[EvaluationResponse]:
+        """evaluate_idea() on a worker thread, so the blocking Gemini call (and the
+        embedding lookup) never stall the event loop."""
+        return await asyncio.to_thread(self.evaluate_idea, submission)
+
+    async def evaluate_many(
+        self, submissions: List[IdeaSubmission], concurrency: Optional[int] = None
+    ) -> List[EvaluationResponse]:
+        """Evaluate a list of submissions in groups of _BATCH_SIZE pitches per Gemini
+        call, with at most `concurrency` (default settings.GEMINI_MAX_CONCURRENCY)
+        calls in flight.
+
+        Results come back in input order. evaluate_batch never raises (failures get
+        the synthetic fallback), so every slot holds a response.
+        """
+        sem = asyncio.Semaphore(max(1, concurrency or settings.GEMINI_MAX_CONCURRENCY))
+
+        async def _group(group: List[IdeaSubmission]) -> List[EvaluationResponse]:
+            async with sem:
+                return await asyncio.to_thread(self.evaluate_batch, group)
+
+        groups = [submissions[i:i + _BATCH_SIZE] for i in range(0, len(submissions), _BATCH_SIZE)]
+        return [r for rs in await asyncio.gather(*(_group(g) for g in groups)) for r in rs]
+
+@lru_cache(maxsize=1)
+def get_ai_service() -> AIService:
+    """Return the process-wide AIService, creating it (and configuring Gemini) on first use."""
+    return AIService()
+
+
+def __getattr__(name):
+    # Keeps `from .ai_service import ai_service` working without building it at import
+    if name == "ai_service":
+        return get_ai_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,55 +1,29 @@
 # services/chatbot_service.py
 
+import hashlib
 import logging
+import threading
 import time
+from functools import lru_cache
 from typing import Optional
-import google.generativeai as genai
-from ..core.config import settings
-from .gemini_client import GeminiMultiKeyClient
+from cachetools import TTLCache
+from .gemini_client import GeminiBase
+from .redis_client import KEY_PREFIX, get_redis
 
 logger = logging.getLogger(__name__)
 
-class ChatbotService:
-    """Service for general chatbot conversations using Gemini"""
-    
-    def __init__(self):
-        self.model = None
-        self.multi_client = None
-        self._initialize_genai()
-    
-    def _initialize_genai(self) -> None:
-        """Initialize Google Generative AI (multi-key if provided)."""
-        try:
-            if settings.GEMINI_API_KEYS:
-                self.multi_client = GeminiMultiKeyClient(settings.GEMINI_API_KEYS, 'gemini-2.5-flash')
-                self.model = None
-                logger.info("ChatbotService using GeminiMultiKeyClient (round-robin keys)")
-            else:
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                self.model = genai.GenerativeModel('gemini-2.5-flash')
-                self.multi_client = None
-                logger.info("Chatbot Gemini AI initialized successfully (single key)")
-        except Exception as e:
-            self.model = None
-            self.multi_client = None
-            logger.error(f"Chatbot Gemini AI initialization failed: {e}")
-    
-    def _extract_text_single(self, response) -> Optional[str]:
-        text = getattr(response, "text", None)
-        if text:
-            return text
-        try:
-            candidates = getattr(response, "candidates", [])
-            if candidates:
-                parts = getattr(candidates[0].content, "parts", [])
-                if parts and hasattr(parts[0], "text"):
-                    return parts[0].text
-        except Exception:
-            return None
-        return None
-    
-    def _create_chat_prompt(self, user_message: str) -> str:
-        return f"""You are MindForge Coder, a focused assistant that helps students implement their AI idea pitches into working prototype code. 
+# Repeated questions (same text, whitespace-normalised) reuse a recent reply
+_REPLY_CACHE_SIZE = 1024
+_REPLY_CACHE_TTL = 3600
+# Same entries in the optional shared Redis cache, under this key prefix
+_SHARED_KEY = KEY_PREFIX + "chat:"
+# Replies are meant to fit a phone screen. 2.5 Flash counts its thinking tokens
+# against max_output_tokens, so the cap sits well above the visible reply and
+# mainly stops runaway generations.
+_CHAT_GENERATION_CONFIG = {'max_output_tokens': 2048}
+
+# Fixed preamble of every chat prompt; the user's message is appended after ": "
+_CHAT_SYSTEM_PROMPT = """You are MindForge Coder, a focused assistant that helps students implement their AI idea pitches into working prototype code. 
     Your role is purely functional and technical — DO NOT evaluate, grade, or comment on creativity. Stay on coding, architecture, 
     and implementation details only. Never provide motivational text or chit-chat.
 
@@ -77,34 +51,99 @@ class ChatbotService:
 
     Identity Reminder: You are NOT a teacher, NOT a judge, NOT a general chatbot. 
     You are a strict coding assistant who helps transform short AI project ideas into runnable code prototypes.
-    : {user_message}"""
+    : """
+
+class ChatbotService(GeminiBase):
+    """Service for general chatbot conversations using Gemini"""
+    
+    def __init__(self):
+        self._initialize_genai('gemini-2.5-flash', generation_config=_CHAT_GENERATION_CONFIG)
+        self._reply_cache: TTLCache = TTLCache(maxsize=_REPLY_CACHE_SIZE, ttl=_REPLY_CACHE_TTL)
+        self._reply_lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(user_message: str) -> str:
+        # Case is kept: identifiers and code in questions are case-sensitive
+        return hashlib.blake2b(" ".join(user_message.split()).encode(), digest_size=16).hexdigest()
+
+    def _cached_reply(self, cache_key: str) -> Optional[str]:
+        with self._reply_lock:
+            reply = self._reply_cache.get(cache_key)
+        if reply is not None:
+            return reply
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            blob = client.get(_SHARED_KEY + cache_key)
+        except Exception as e:  # noqa: BLE001
+            logger.debug("chatbot.shared_cache get failed: %s", e)
+            return None
+        if not blob:
+            return None
+        reply = blob.decode()
+        with self._reply_lock:
+            self._reply_cache[cache_key] = reply
+        return reply
+
+    def _remember_reply(self, cache_key: str, reply: str) -> None:
+        with self._reply_lock:
+            self._reply_cache[cache_key] = reply
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.setex(_SHARED_KEY + cache_key, _REPLY_CACHE_TTL, reply.encode())
+        except Exception as e:  # noqa: BLE001
+            logger.debug("chatbot.shared_cache put failed: %s", e)
+    
+    def _create_chat_prompt(self, user_message: str) -> str:
+        return _CHAT_SYSTEM_PROMPT + user_message
     
     def get_chat_response(self, user_message: str) -> str:
         try:
             t0 = time.perf_counter()
-            logger.info(f"chatbot.request message_chars={len(user_message)}")
-            
+            logger.info("chatbot.request message_chars=%d", len(user_message))
+
+            cache_key = self._cache_key(user_message)
+            cached = self._cached_reply(cache_key)
+            if cached is not None:
+                logger.info("chatbot.cache_hit elapsed_ms=%.1f", (time.perf_counter() - t0) * 1000)
+                return cached
+
             prompt = self._create_chat_prompt(user_message)
             
             if getattr(self, 'multi_client', None):
                 response = self.multi_client.generate(prompt)
-                text = self.multi_client.extract_text(response)
+                text = self._extract_text(response)
             else:
                 if not getattr(self, 'model', None):
                     raise RuntimeError("AI model not initialized")
                 response = self.model.generate_content(prompt)
-                text = self._extract_text_single(response)
+                text = self._extract_text(response)
             
             if not text:
                 raise RuntimeError("Empty response from AI")
             
-            elapsed_ms = (time.perf_counter() - t0) * 1000
-            logger.info(f"chatbot.success elapsed_ms={elapsed_ms:.1f} response_chars={len(text)}")
+            logger.info(
+                "chatbot.success elapsed_ms=%.1f response_chars=%d", (time.perf_counter() - t0) * 1000, len(text)
+            )
             
-            return text.strip()
+            reply = text.strip()
+            self._remember_reply(cache_key, reply)
+            return reply
         except Exception as e:
-            logger.error(f"chatbot.error: {e}")
+            logger.error("chatbot.error: %s", e)
             raise RuntimeError(f"Failed to get chat response: {str(e)}")
 
-# Singleton instance
-chatbot_service = ChatbotService()
+@lru_cache(maxsize=1)
+def get_chatbot_service() -> ChatbotService:
+    """Return the process-wide ChatbotService, creating it (and configuring Gemini) on first use."""
+    return ChatbotService()
+
+
+def __getattr__(name):
+    # Keeps `from .chatbot_service import chatbot_service` working without building it at import
+    if name == "chatbot_service":
+        return get_chatbot_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
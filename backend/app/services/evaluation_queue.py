@@ -6,17 +6,23 @@ reduce the chance of triggering per-minute rate limits across keys.
 
 Design:
   - In-memory only (resets on restart) – acceptable for live event day.
-  - Single worker coroutine consumes an asyncio.Queue.
+  - One worker coroutine per Gemini API key consumes a shared asyncio.Queue,
+    so evaluations overlap their API waits without exceeding key quota.
   - Each job stored in a dict by UUID with status transitions:
       pending -> processing -> done | error
   - Processing attempts agentic evaluation first, then static AI, mirroring
     synchronous endpoint behavior.
-  - Leaderboard + profile updates occur only after a successful evaluation.
+  - Leaderboard + profile updates occur only after a successful evaluation;
+    if Firebase is configured but that write fails, the job ends in error.
+  - With REDIS_URL set, every status transition is also mirrored to Redis
+    (24 h TTL), so a status poll answered by another worker process, or
+    after a restart, still finds the job.
 
 Limitations:
-  - Loss of jobs on server restart.
-  - No persistence / retry scheduling.
-  - Sequential worker (can be extended to small parallelism if needed).
+  - Jobs still pending or processing are lost on server restart (their last
+    mirrored status stays visible but never advances).
+  - No retry scheduling.
+  - Parallelism is fixed at startup by the number of configured keys.
 
 For larger scale or persistence needs, migrate to Redis / Cloud Tasks.
 """
@@ -28,15 +34,23 @@ import uuid
 import logging
 import time
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional
 
+import orjson
+
+from ..core.config import settings
 from ..models.schemas import IdeaSubmission, EvaluationResponse
-from .agent_service import agent_service
-from .ai_service import ai_service
-from .firebase_service import firebase_service
+from .agent_service import get_agent_service
+from .ai_service import get_ai_service
+from .firebase_service import AlreadySubmitted, get_firebase_service
+from .redis_client import KEY_PREFIX, get_redis
 
 logger = logging.getLogger(__name__)
 
+# Job status mirror in the optional shared Redis
+_JOB_KEY = KEY_PREFIX + "eval:job:"
+_JOB_TTL = 24 * 3600
+
 
 @dataclass
 class EvalJob:
@@ -52,41 +66,83 @@ class EvaluationQueue:
         self._queue: asyncio.Queue[EvalJob] = asyncio.Queue()
         self._jobs: Dict[str, EvalJob] = {}
         self._lock = asyncio.Lock()
-        self._worker_task: Optional[asyncio.Task] = None
+        self._worker_tasks: List[asyncio.Task] = []
         self._shutdown = asyncio.Event()
 
     def start(self) -> None:
-        if self._worker_task is None:
-            self._worker_task = asyncio.create_task(self._worker_loop())
-            logger.info("EvaluationQueue worker started")
+        if not self._worker_tasks:
+            # One worker per key: each key serves one evaluation at a time
+            workers = max(1, len(settings.GEMINI_API_KEYS))
+            self._worker_tasks = [
+                asyncio.create_task(self._worker_loop()) for _ in range(workers)
+            ]
+            logger.info("EvaluationQueue started with %d worker(s)", workers)
 
     async def stop(self) -> None:
         self._shutdown.set()
-        if self._worker_task:
-            await self._worker_task
-            logger.info("EvaluationQueue worker stopped")
+        if self._worker_tasks:
+            await asyncio.gather(*self._worker_tasks)
+            logger.info("EvaluationQueue workers stopped")
 
     async def enqueue(self, submission: IdeaSubmission) -> str:
         job_id = str(uuid.uuid4())
         job = EvalJob(id=job_id, submission=submission)
         async with self._lock:
             self._jobs[job_id] = job
+            data = self._status_data(job)
+        await self._publish(data)
         await self._queue.put(job)
         return job_id
 
     async def get_status(self, job_id: str) -> Optional[dict]:
         async with self._lock:
             job = self._jobs.get(job_id)
-            if not job:
-                return None
-            data = {
-                "id": job.id,
-                "status": job.status,
-                "error": job.error,
-            }
-            if job.result:
-                data["result"] = job.result.model_dump()
-            return data
+            if job:
+                return self._status_data(job)
+        # Not ours (another worker process) or from before a restart
+        return await self._shared_status(job_id)
+
+    @staticmethod
+    def _status_data(job: EvalJob) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "id": job.id,
+            "status": job.status,
+            "error": job.error,
+        }
+        if job.result:
+            data["result"] = job.result.model_dump()
+        return data
+
+    async def _set_status(self, job: EvalJob, status: str, **fields: Any) -> None:
+        """Apply a status transition and mirror it to Redis (if configured)."""
+        async with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.status = status
+            data = self._status_data(job)
+        await self._publish(data)
+
+    @staticmethod
+    async def _publish(data: Dict[str, Any]) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            await asyncio.to_thread(client.setex, _JOB_KEY + data["id"], _JOB_TTL, orjson.dumps(data))
+        except Exception as e:  # noqa: BLE001
+            logger.debug("evaluation_queue.shared_status put failed: %s", e)
+
+    @staticmethod
+    async def _shared_status(job_id: str) -> Optional[dict]:
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            blob = await asyncio.to_thread(client.get, _JOB_KEY + job_id)
+            return orjson.loads(blob) if blob else None
+        except Exception as e:  # noqa: BLE001
+            logger.debug("evaluation_queue.shared_status get failed: %s", e)
+            return None
 
     async def _worker_loop(self) -> None:
         while not self._shutdown.is_set():
@@ -100,62 +156,59 @@ class EvaluationQueue:
                 self._queue.task_done()
 
     async def _process_job(self, job: EvalJob) -> None:
-        async with self._lock:
-            job.status = "processing"
-        logger.info(f"Processing evaluation job {job.id} for {job.submission.uid}")
+        await self._set_status(job, "processing")
+        logger.info("Processing evaluation job %s for %s", job.id, job.submission.uid)
         start_time = time.perf_counter()
         try:
             # Agentic first
-            logger.debug(
-                "job=%s stage=agent_service.start uid=%s idea_preview=%r",
-                job.id,
-                job.submission.uid,
-                (job.submission.idea[:120] + '…') if len(job.submission.idea) > 120 else job.submission.idea,
-            )
-            result = agent_service.evaluate(job.submission)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "job=%s stage=agent_service.start uid=%s idea_preview=%r",
+                    job.id,
+                    job.submission.uid,
+                    (job.submission.idea[:120] + '…') if len(job.submission.idea) > 120 else job.submission.idea,
+                )
+            # Evaluation and Firestore calls are blocking; run them on worker threads
+            # so the event loop keeps serving requests (and status polls) meanwhile.
+            result = await get_agent_service().evaluate_async(job.submission)
             if not result:
                 logger.debug("job=%s stage=agent_service.fallback_to_ai uid=%s", job.id, job.submission.uid)
-                result = ai_service.evaluate_idea(job.submission)
+                result = await get_ai_service().evaluate_idea_async(job.submission)
             if not result:
                 raise RuntimeError("All evaluation strategies failed")
 
-            # Persist user idea and leaderboard (mirrors synchronous path)
-            try:
-                firebase_service.save_user_idea(job.submission.uid, {
-                    'round': '1',
-                    'idea': job.submission.idea,
-                })
-            except Exception:  # noqa: BLE001
-                pass
-
-            # Update leaderboard & profile (totalScore already computed from 5 metrics)
-            try:
-                firebase_service.update_leaderboard(job.submission.uid, {
-                    'name': job.submission.name,
-                    'branch': job.submission.branch,
-                    'score': result.totalScore,
-                })
-            except Exception:  # noqa: BLE001
-                pass
+            # Claim the submission, update the profile, save the idea and post the
+            # leaderboard entry in one Firestore transaction (a single round-trip);
+            # a concurrent duplicate job loses here before anything is written.
+            firebase = get_firebase_service()
             try:
-                existing = firebase_service.get_user_profile(job.submission.uid) or {}
-                prev_best = existing.get('personalBestScore')
-                personal_best = max(prev_best or 0, result.totalScore)
-                firebase_service.upsert_user_profile(job.submission.uid, {
-                    'uid': job.submission.uid,
-                    'name': job.submission.name,
-                    'branch': job.submission.branch,
-                    'rollNumber': job.submission.rollNumber,
-                    'lastEvaluation': result.model_dump(),
-                    'hasSubmitted': True,
-                    'personalBestScore': personal_best,
-                })
-            except Exception:  # noqa: BLE001
-                pass
-
-            async with self._lock:
-                job.result = result
-                job.status = "done"
+                recorded = await asyncio.to_thread(
+                    firebase.submit_atomic,
+                    job.submission.uid,
+                    {
+                        'uid': job.submission.uid,
+                        'name': job.submission.name,
+                        'branch': job.submission.branch,
+                        'rollNumber': job.submission.rollNumber,
+                        'lastEvaluation': result.model_dump(),
+                    },
+                    result.totalScore,
+                    idea={'round': str(settings.CURRENT_ROUND), 'idea': job.submission.idea},
+                    # totalScore already computed from 5 metrics
+                    leaderboard={
+                        'name': job.submission.name,
+                        'branch': job.submission.branch,
+                        'score': result.totalScore,
+                    },
+                )
+            except AlreadySubmitted:
+                raise RuntimeError("Already submitted")
+            # Without Firebase configured (local dev) there is nothing to record; otherwise a
+            # failed commit wrote nothing, so report it rather than show an unsaved score
+            if not recorded and firebase.enabled:
+                raise RuntimeError("Could not save the submission; please try again")
+
+            await self._set_status(job, "done", result=result)
             elapsed = (time.perf_counter() - start_time) * 1000
             logger.info(
                 "Evaluation complete job=%s uid=%s score=%s elapsed_ms=%.1f path=%s",
@@ -166,10 +219,8 @@ class EvaluationQueue:
                 "agent" if 'agent' in (result.feedback.lower() if result and result.feedback else '') else "mixed/ai",
             )
         except Exception as e:  # noqa: BLE001
-            logger.error(f"Evaluation job {job.id} failed: {e}")
-            async with self._lock:
-                job.status = "error"
-                job.error = str(e)
+            logger.error("Evaluation job %s failed: %s", job.id, e)
+            await self._set_status(job, "error", error=str(e))
 
 
 # Singleton instance
@@ -1,55 +1,178 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Any, Iterable, Optional, Set, Tuple
+from cachetools import TTLCache
 from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# firebase_admin (and the Firestore client library under it) is imported on first
+# use rather than at module import; it is one of the slowest imports in the app.
+
+# Short-lived users/{uid} read cache for the duplicate-submission guard
+_PROFILE_CACHE_TTL = 60
+_PROFILE_CACHE_SIZE = 10_000
+_MISSING = object()
+# Fetched leaderboards, keyed by the requested limit. Past LEADERBOARD_CACHE_TTL an
+# entry is still served for up to _LEADERBOARD_STALE_FOR seconds while a background
+# refresh replaces it (stale-while-revalidate).
+_LEADERBOARD_CACHE_SIZE = 16
+_LEADERBOARD_STALE_FOR = 60
+# After Firestore is found unreachable, calls fail fast for this many seconds
+# instead of each one waiting out the gRPC deadline
+_UNAVAILABLE_FOR = 5.0
+# Tries per document in bulk writes before it is reported as failed (the SDK default is 15)
+_BULK_MAX_ATTEMPTS = 5
+
+
+@lru_cache(maxsize=1)
+def _certificate() -> Tuple[Optional[Any], str]:
+    """Parse the split FIREBASE_* credentials once per process.
+
+    The Certificate holds the parsed private key and its signer, so a retried
+    initialization (and every token refresh) reuses them instead of re-reading
+    the PEM. Built on first call rather than at import, like firebase_admin itself.
+    """
+    info = settings.firebase_credentials
+    if info:
+        try:
+            from firebase_admin import credentials
+
+            return credentials.Certificate(info), "env_split"
+        except Exception as e:
+            logger.warning("Invalid split FIREBASE_* env credentials: %s", e)
+    return None, "missing"
+
+
+class AlreadySubmitted(Exception):
+    """Raised when a user's profile already records a submission."""
+
+
 class FirebaseService:
     """Service for Firebase Firestore operations"""
     
     def __init__(self):
         self._firebase_available = False
+        self._unavailable_until = 0.0
+        self._profile_cache: TTLCache = TTLCache(maxsize=_PROFILE_CACHE_SIZE, ttl=_PROFILE_CACHE_TTL)
+        self._profile_lock = threading.Lock()
+        self._leaderboard_ttl = max(0.0, settings.LEADERBOARD_CACHE_TTL)
+        # Entries are (fetched_at, data); kept past the TTL only for the stale window
+        self._leaderboard_cache: TTLCache = TTLCache(
+            maxsize=_LEADERBOARD_CACHE_SIZE,
+            ttl=self._leaderboard_ttl + _LEADERBOARD_STALE_FOR if self._leaderboard_ttl else 0,
+        )
+        self._leaderboard_lock = threading.Lock()
+        # Bumped by every leaderboard write so fetches started earlier do not re-cache old data
+        self._leaderboard_gen = 0
+        self._leaderboard_refreshing: Set[Optional[int]] = set()
         self._initialize_firebase()
+
+    @property
+    def enabled(self) -> bool:
+        """Firebase was initialized (credentials configured and the client built)."""
+        return self._firebase_available
+
+    def _available(self) -> bool:
+        """Firebase is initialized and not inside a recent-outage window."""
+        return self._firebase_available and time.monotonic() >= self._unavailable_until
+
+    def _note_failure(self, err: Exception) -> None:
+        """Open the fail-fast window if `err` means Firestore itself is unreachable."""
+        try:
+            from google.api_core import exceptions as gexc
+        except ImportError:
+            return
+        if isinstance(err, (gexc.ServiceUnavailable, gexc.DeadlineExceeded, gexc.RetryError)):
+            self._unavailable_until = time.monotonic() + _UNAVAILABLE_FOR
+            logger.warning("Firestore unreachable; failing fast for %.0fs", _UNAVAILABLE_FOR)
+
+    def _invalidate_leaderboard(self) -> None:
+        with self._leaderboard_lock:
+            self._leaderboard_gen += 1
+            self._leaderboard_cache.clear()
+
+    def cached_leaderboard(self, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Leaderboard from the in-memory cache only (never blocks on Firestore).
+
+        Lets async callers answer cache hits on the event loop and reserve a
+        worker thread for the actual fetch. A stale entry is returned as-is and
+        one background refresh is started for it. Returns None on a miss.
+        """
+        with self._leaderboard_lock:
+            entry = self._leaderboard_cache.get(limit)
+            if entry is None:
+                return None
+            fetched_at, data = entry
+            stale = time.monotonic() - fetched_at >= self._leaderboard_ttl
+            if stale and limit not in self._leaderboard_refreshing:
+                self._leaderboard_refreshing.add(limit)
+                threading.Thread(
+                    target=self._refresh_leaderboard, args=(limit,), name="leaderboard-refresh", daemon=True
+                ).start()
+        return dict(data)
+
+    def _refresh_leaderboard(self, limit: Optional[int]) -> None:
+        try:
+            # Keep serving the stale copy rather than queue behind an outage
+            if self._available():
+                self._fetch_leaderboard(limit)
+        except Exception as e:
+            self._note_failure(e)
+            logger.warning("Background leaderboard refresh failed: %s", e)
+        finally:
+            with self._leaderboard_lock:
+                self._leaderboard_refreshing.discard(limit)
+
+    def _fetch_leaderboard(self, limit: Optional[int]) -> Dict[str, Any]:
+        """Query Firestore for the ranked leaderboard and cache the result."""
+        from firebase_admin import firestore
+
+        with self._leaderboard_lock:
+            gen = self._leaderboard_gen
+        query = (
+            self._leaderboard
+            .select(['name', 'branch', 'score'])
+            .order_by('score', direction=firestore.Query.DESCENDING)
+        )
+        if limit:
+            query = query.limit(limit)
+        data: Dict[str, Any] = {}
+        for doc in query.stream():
+            data[doc.id] = doc.to_dict() or {}
+        with self._leaderboard_lock:
+            if gen == self._leaderboard_gen:
+                self._leaderboard_cache[limit] = (time.monotonic(), data)
+        return data
+
+    def _merge_cached_profile(self, uid: str, fields: Dict[str, Any]) -> None:
+        """Apply a merge=True write to the cached profile, or drop it if not cached."""
+        with self._profile_lock:
+            cached = self._profile_cache.get(uid)
+            if cached:
+                self._profile_cache[uid] = {**cached, **fields}
+            else:
+                self._profile_cache.pop(uid, None)
     
     def _get_credentials(self):
         """Build firebase_admin credentials strictly from split env variables.
         Returns a tuple (cred_or_none, source_str).
         """
-        if (
-            settings.FIREBASE_PRIVATE_KEY
-            and settings.FIREBASE_CLIENT_EMAIL
-            and settings.FIREBASE_PRIVATE_KEY_ID
-        ):
-            try:
-                info = {
-                    "type": settings.FIREBASE_TYPE or "service_account",
-                    "project_id": settings.FIREBASE_PROJECT_ID,
-                    "private_key_id": settings.FIREBASE_PRIVATE_KEY_ID,
-                    # Ensure newlines are real
-                    "private_key": settings.FIREBASE_PRIVATE_KEY.replace("\\n", "\n"),
-                    "client_email": settings.FIREBASE_CLIENT_EMAIL,
-                    "client_id": settings.FIREBASE_CLIENT_ID,
-                    "auth_uri": settings.FIREBASE_AUTH_URI,
-                    "token_uri": settings.FIREBASE_TOKEN_URI,
-                    "auth_provider_x509_cert_url": settings.FIREBASE_AUTH_PROVIDER_X509_CERT_URL,
-                    "client_x509_cert_url": settings.FIREBASE_CLIENT_X509_CERT_URL,
-                    "universe_domain": settings.FIREBASE_UNIVERSE_DOMAIN,
-                }
-                return credentials.Certificate(info), "env_split"
-            except Exception as e:
-                logger.warning(f"Invalid split FIREBASE_* env credentials: {e}")
-        return None, "missing"
+        return _certificate()
 
     def _initialize_firebase(self) -> None:
         """Initialize Firebase Admin SDK and Firestore client"""
         try:
+            import firebase_admin
+            from firebase_admin import firestore
+
             if not firebase_admin._apps:
                 cred, source = self._get_credentials()
                 if cred is not None:
                     firebase_admin.initialize_app(cred)
-                    logger.info(f"Firebase initialized with credentials source: {source}")
+                    logger.info("Firebase initialized with credentials source: %s", source)
                 else:
                     logger.warning("Firebase split credentials missing; skipping initialization")
                     self._firebase_available = False
@@ -57,15 +180,67 @@ class FirebaseService:
 
             # Initialize Firestore client
             self._db = firestore.client()
+            # Collection handles reused by every call instead of rebuilt per request
+            self._leaderboard = self._db.collection('leaderboard')
+            self._users = self._db.collection('users')
             self._firebase_available = True
         except Exception as e:
-            logger.error(f"Firebase initialization error: {e}")
+            logger.error("Firebase initialization error: %s", e)
             self._firebase_available = False
     
+    def backfill_missing_scores(self) -> bool:
+        """Give leaderboard docs without a score `score: 0` (one-time migration).
+
+        get_leaderboard ranks with order_by('score'), which leaves out documents
+        that lack the field. Every writer here sets it; this repairs older docs.
+        Scans the whole collection, so it is run on demand
+        (scripts/backfill_leaderboard_scores.py), never at startup. Each update is
+        conditional on the doc being unchanged, so it never overwrites a score
+        written meanwhile.
+
+        Returns:
+            bool: True if nothing was missing or every update succeeded
+        """
+        if not self._available():
+            logger.warning("Firebase not available, skipping score backfill")
+            return False
+        try:
+            stale = [
+                snap for snap in self._leaderboard.select(['score']).stream()
+                if (snap.to_dict() or {}).get('score') is None
+            ]
+            if not stale:
+                logger.info("No leaderboard entries missing a score")
+                return True
+            ok = self._bulk_write(lambda bw: [
+                bw.update(
+                    snap.reference,
+                    {'score': 0},
+                    option=self._db.write_option(last_update_time=snap.update_time),
+                )
+                for snap in stale
+            ])
+            self._invalidate_leaderboard()
+            if ok:
+                logger.info("Backfilled score=0 on %d leaderboard entries", len(stale))
+            return ok
+        except Exception as e:
+            self._note_failure(e)
+            logger.error("Leaderboard score backfill failed: %s", e)
+            return False
+
+    @staticmethod
+    def _leaderboard_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+        """`data` with a score guaranteed (0 when missing), so the entry stays ranked."""
+        return data if data.get('score') is not None else {**data, 'score': 0}
+
     def update_leaderboard(self, uid: str, user_data: Dict[str, Any]) -> bool:
         """
         Update user's leaderboard entry
         
+        The entry always gets a `score` (0 if not given), since documents
+        without one are left out of the ranked get_leaderboard query.
+        
         Args:
             uid: Firebase user ID
             user_data: Dictionary containing name, branch, and score
@@ -73,41 +248,57 @@ class FirebaseService:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self._firebase_available:
+        if not self._available():
             logger.warning("Firebase not available, skipping leaderboard update")
             return False
             
         try:
             # Firestore: collection 'leaderboard', document per uid
-            doc_ref = self._db.collection('leaderboard').document(uid)
-            doc_ref.set(user_data)
-            logger.info(f"Leaderboard updated for user {uid}: {user_data.get('name')}")
+            doc_ref = self._leaderboard.document(uid)
+            doc_ref.set(self._leaderboard_entry(user_data))
+            self._invalidate_leaderboard()
+            logger.info("Leaderboard updated for user %s: %s", uid, user_data.get('name'))
             return True
         except Exception as e:
-            logger.error(f"Failed to update leaderboard for user {uid}: {e}")
+            self._note_failure(e)
+            logger.error("Failed to update leaderboard for user %s: %s", uid, e)
             return False
     
-    def get_leaderboard(self) -> Optional[Dict[str, Any]]:
+    def get_leaderboard(self, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
-        Get current leaderboard data
+        Get current leaderboard data, highest score first
+        
+        Sorting and the optional top-N cut happen in Firestore; only the
+        public fields (name, branch, score) are transferred. Firestore leaves
+        documents without a `score` out of the ordering, so every writer sets
+        one (see backfill_missing_scores for older entries). Results are served
+        from memory for LEADERBOARD_CACHE_TTL seconds, then stale-while-revalidate
+        for up to _LEADERBOARD_STALE_FOR more; leaderboard writes made through
+        this service drop the cached copies.
+        
+        Args:
+            limit: Maximum number of entries to return (None for all)
         
         Returns:
-            dict: Leaderboard data or None if error
+            dict: Leaderboard data keyed by uid, in rank order, or None if error
         """
         if not self._firebase_available:
             logger.warning("Firebase not available, returning empty leaderboard")
             return {}
+        cached = self.cached_leaderboard(limit)
+        if cached is not None:
+            return cached
+        if not self._available():
+            logger.warning("Firestore recently unreachable; not fetching leaderboard")
+            return None
             
         try:
-            # Fetch all leaderboard entries from Firestore
-            docs = self._db.collection('leaderboard').stream()
-            data: Dict[str, Any] = {}
-            for doc in docs:
-                data[doc.id] = doc.to_dict() or {}
-            logger.info("Leaderboard data fetched successfully")
-            return data
+            data = self._fetch_leaderboard(limit)
+            logger.debug("Leaderboard data fetched successfully")
+            return dict(data)
         except Exception as e:
-            logger.error(f"Failed to fetch leaderboard: {e}")
+            self._note_failure(e)
+            logger.error("Failed to fetch leaderboard: %s", e)
             return None
     
     def delete_user_entry(self, uid: str) -> bool:
@@ -120,70 +311,227 @@ class FirebaseService:
         Returns:
             bool: True if successful, False otherwise
         """
-        if not self._firebase_available:
+        if not self._available():
             logger.warning("Firebase not available, skipping delete operation")
             return False
         
         try:
-            self._db.collection('leaderboard').document(uid).delete()
-            logger.info(f"Deleted leaderboard entry for user {uid}")
+            self._leaderboard.document(uid).delete()
+            self._invalidate_leaderboard()
+            logger.info("Deleted leaderboard entry for user %s", uid)
             return True
         except Exception as e:
-            logger.error(f"Failed to delete leaderboard entry for user {uid}: {e}")
+            self._note_failure(e)
+            logger.error("Failed to delete leaderboard entry for user %s: %s", uid, e)
             return False
 
+    def delete_user_entries(self, uids: Iterable[str]) -> bool:
+        """
+        Delete many leaderboard entries (e.g. event-end cleanup)
+        
+        Uses Firestore's BulkWriter, which batches, parallelizes and retries
+        the deletes instead of one round-trip per document.
+        
+        Args:
+            uids: Firebase user IDs
+            
+        Returns:
+            bool: True if every delete succeeded, False otherwise
+        """
+        if not self._available():
+            logger.warning("Firebase not available, skipping bulk delete")
+            return False
+        uids = list(uids)
+        ok = self._bulk_write(lambda bw: [bw.delete(self._leaderboard.document(uid)) for uid in uids])
+        self._invalidate_leaderboard()
+        if ok:
+            logger.info("Deleted %d leaderboard entries", len(uids))
+        return ok
+
+    def _bulk_write(self, queue: Callable[[Any], Any]) -> bool:
+        """Run `queue(bulk_writer)` and wait for every write; False if any write failed."""
+        failed = []
+
+        def _on_error(failure, _writer) -> bool:
+            if failure.attempts < _BULK_MAX_ATTEMPTS:
+                return True
+            failed.append(failure)
+            return False
+
+        try:
+            bw = self._db.bulk_writer()
+            bw.on_write_error(_on_error)
+            queue(bw)
+            bw.close()
+        except Exception as e:
+            self._note_failure(e)
+            logger.error("Bulk write failed: %s", e)
+            return False
+        if failed:
+            logger.error("Bulk write: %d writes failed (first: %s)", len(failed), failed[0].message)
+        return not failed
+
     # User profile operations
     def upsert_user_profile(self, uid: str, profile: Dict[str, Any]) -> bool:
         """
         Create or update a user's profile in Firestore
         Collection: users/{uid}
         """
-        if not self._firebase_available:
+        if not self._available():
             logger.warning("Firebase not available, skipping user profile upsert")
             return False
         try:
-            doc_ref = self._db.collection('users').document(uid)
+            doc_ref = self._users.document(uid)
             doc_ref.set(profile, merge=True)
-            logger.info(f"User profile upserted for {uid}")
+            self._merge_cached_profile(uid, profile)
+            logger.info("User profile upserted for %s", uid)
             return True
         except Exception as e:
-            logger.error(f"Failed to upsert user profile for {uid}: {e}")
+            self._note_failure(e)
+            logger.error("Failed to upsert user profile for %s: %s", uid, e)
             return False
 
+    def upsert_user_profiles(self, profiles: Dict[str, Dict[str, Any]]) -> bool:
+        """
+        Create or update many users' profiles (merge), keyed by uid
+        Collection: users/{uid}
+        """
+        if not self._available():
+            logger.warning("Firebase not available, skipping bulk profile upsert")
+            return False
+        ok = self._bulk_write(
+            lambda bw: [bw.set(self._users.document(uid), p, merge=True) for uid, p in profiles.items()]
+        )
+        # Failed writes are not reported per uid; drop rather than merge the cached copies
+        with self._profile_lock:
+            for uid in profiles:
+                self._profile_cache.pop(uid, None)
+        if ok:
+            logger.info("User profiles upserted for %d users", len(profiles))
+        return ok
+
     def get_user_profile(self, uid: str) -> Optional[Dict[str, Any]]:
-        """Fetch a user's profile from Firestore"""
+        """Fetch a user's profile from Firestore
+
+        Results (including "not found") are cached for _PROFILE_CACHE_TTL seconds;
+        writes made through this service keep the cache in step.
+        """
         if not self._firebase_available:
             logger.warning("Firebase not available, returning None for user profile")
             return None
-        try:
-            doc = self._db.collection('users').document(uid).get()
-            if doc.exists:
-                return doc.to_dict() or None
+        with self._profile_lock:
+            cached = self._profile_cache.get(uid, _MISSING)
+        if cached is not _MISSING:
+            return dict(cached) if cached else None
+        if not self._available():
+            logger.warning("Firestore recently unreachable; not fetching profile for %s", uid)
             return None
+        try:
+            doc = self._users.document(uid).get()
+            data = (doc.to_dict() or None) if doc.exists else None
+            with self._profile_lock:
+                self._profile_cache[uid] = data
+            return dict(data) if data else None
         except Exception as e:
-            logger.error(f"Failed to fetch user profile for {uid}: {e}")
+            self._note_failure(e)
+            logger.error("Failed to fetch user profile for %s: %s", uid, e)
             return None
 
+    def submit_atomic(
+        self,
+        uid: str,
+        profile: Dict[str, Any],
+        score: int,
+        idea: Optional[Dict[str, Any]] = None,
+        leaderboard: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Record an evaluated submission on users/{uid} in one transaction.
+
+        Reads the profile and writes the update (hasSubmitted + personalBestScore)
+        atomically, replacing a separate get_user_profile + upsert_user_profile pair.
+        When given, the idea document (as in save_user_idea) and the leaderboard
+        entry (as in update_leaderboard) are written in the same commit, so a
+        submission costs one round-trip and never lands half-recorded.
+
+        Raises:
+            AlreadySubmitted: if the stored profile already has hasSubmitted set
+        """
+        if not self._available():
+            logger.warning("Firebase not available, skipping atomic submission")
+            return False
+
+        from firebase_admin import firestore
+
+        doc_ref = self._users.document(uid)
+
+        @firestore.transactional
+        def _apply(transaction) -> Dict[str, Any]:
+            snapshot = doc_ref.get(transaction=transaction)
+            existing = (snapshot.to_dict() or {}) if snapshot.exists else {}
+            if existing.get('hasSubmitted'):
+                raise AlreadySubmitted(uid)
+            payload = dict(profile)
+            payload['hasSubmitted'] = True
+            payload['personalBestScore'] = max(existing.get('personalBestScore') or 0, score)
+            transaction.set(doc_ref, payload, merge=True)
+            if idea is not None:
+                round_id, idea_doc = self._idea_document(idea)
+                transaction.set(doc_ref.collection('ideas').document(round_id), idea_doc)
+            if leaderboard is not None:
+                transaction.set(self._leaderboard.document(uid), self._leaderboard_entry(leaderboard))
+            return payload
+
+        try:
+            payload = _apply(self._db.transaction())
+            self._merge_cached_profile(uid, payload)
+            if leaderboard is not None:
+                self._invalidate_leaderboard()
+            logger.info("Submission recorded atomically for %s", uid)
+            return True
+        except AlreadySubmitted:
+            raise
+        except Exception as e:
+            self._note_failure(e)
+            logger.error("Failed atomic submission for %s: %s", uid, e)
+            return False
+
     # Idea persistence (private)
+    @staticmethod
+    def _idea_document(data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Return (round_id, document) for users/{uid}/ideas/{round}"""
+        from firebase_admin import firestore
+
+        round_id = str(data.get('round') or '1')
+        return round_id, {
+            'idea': data.get('idea', ''),
+            'round': round_id,
+            'createdAt': firestore.SERVER_TIMESTAMP,
+        }
+
     def save_user_idea(self, uid: str, data: Dict[str, Any]) -> bool:
         """Save the raw idea under users/{uid}/ideas/{round} with timestamp"""
-        if not self._firebase_available:
+        if not self._available():
             logger.warning("Firebase not available, skipping idea save")
             return False
         try:
-            round_id = str(data.get('round') or '1')
-            doc_ref = self._db.collection('users').document(uid).collection('ideas').document(round_id)
-            payload = {
-                'idea': data.get('idea', ''),
-                'round': round_id,
-                'createdAt': firestore.SERVER_TIMESTAMP,
-            }
+            round_id, payload = self._idea_document(data)
+            doc_ref = self._users.document(uid).collection('ideas').document(round_id)
             doc_ref.set(payload)
-            logger.info(f"Saved idea for user {uid} round {round_id}")
+            logger.info("Saved idea for user %s round %s", uid, round_id)
             return True
         except Exception as e:
-            logger.error(f"Failed to save idea for {uid}: {e}")
+            self._note_failure(e)
+            logger.error("Failed to save idea for %s: %s", uid, e)
             return False
 
-# Create singleton instance
-firebase_service = FirebaseService()
+@lru_cache(maxsize=1)
+def get_firebase_service() -> FirebaseService:
+    """Return the process-wide FirebaseService, creating it (and initializing Firebase) on first use."""
+    return FirebaseService()
+
+
+def __getattr__(name):
+    # Keeps `from .firebase_service import firebase_service` working without building it at import
+    if name == "firebase_service":
+        return get_firebase_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,88 +8,204 @@ to support round-robin API key usage with basic, thread-safe protection.
 Why this exists:
 - The SDK uses a global configuration for the API key.
 - In a web server with concurrent requests, switching the global key can race.
-- We serialize configure()+call per request to ensure the right key is used.
+- Instead, each key gets its own SDK service client (built once per process and
+  shared by every GeminiMultiKeyClient), so calls on different keys - or on the
+  same key - run concurrently without touching the global configuration.
 - We rotate across keys to reduce rate-limit hits during the live event.
 
-Trade-offs:
-- Calls are serialized at the point of configure()+generate. For short, fast
-  Gemini Flash calls, this is usually acceptable for a one-day event. If you
-  need higher concurrency, consider multiple worker processes with sharded keys.
+If the SDK's per-key client factory is unavailable, calls fall back to
+serializing configure()+call under a lock so the right key is still used.
+
+The SDK itself is imported on first use, so importing this module (and the
+services built on it) does not pay google-generativeai's import cost.
 """
 
 from __future__ import annotations
 
 import logging
+import random
+import re
 import threading
-from typing import List, Optional
-
-import google.generativeai as genai
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, TypeVar
 
-from .key_manager import RoundRobinKeyManager
+from ..core.config import settings
+from .key_manager import get_shared_key_manager
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# google.api_core errors carry the HTTP status as `.code`; messages are only
+# matched for errors the SDK surfaces without one. No bare "exceeded": a
+# DeadlineExceeded (504) is a slow call, not a throttled key.
+_RATE_LIMIT_RE = re.compile(r"rate limit|quota|429|resource exhausted", re.IGNORECASE)
+_INVALID_KEY_RE = re.compile(r"401|unauthenticated|api key not valid|api_key_invalid", re.IGNORECASE)
+# When every key is cooling down, wait a random 0..min(base * 2**attempt, cap)
+# seconds (full jitter) before the next try, so concurrent callers spread out
+_BACKOFF_BASE = 0.1
+_BACKOFF_CAP = 5.0
+
+
+@lru_cache(maxsize=None)
+def _service_client(api_key: str) -> Optional[Any]:
+    """The SDK's generative service client bound to one API key (None if unsupported).
+
+    Built through a private SDK client manager configured with just this key, so
+    it carries the same transport and metadata as a genai.configure() client.
+    """
+    try:
+        from google.generativeai.client import _ClientManager
+
+        manager = _ClientManager()
+        manager.configure(api_key=api_key)
+        return manager.get_default_client('generative')
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Per-key Gemini client unavailable; serializing calls instead. Error: %s", e)
+        return None
+
 
 class GeminiMultiKeyClient:
     """Round-robin, thread-safe Gemini caller.
 
     - Rotates through provided API keys.
-    - Serializes SDK configure()+call to avoid cross-thread key bleed.
+    - Calls each key through its own service client (no global configure()).
     - Retries on rate-limit-like errors by switching to the next key.
+    - Skips keys that are cooling down after a 429 or were rejected as invalid.
     """
 
-    def __init__(self, keys: List[str], model_name: str = 'gemini-2.5-flash') -> None:
+    def __init__(self, keys: List[str], model_name: str = 'gemini-2.5-flash', generation_config=None) -> None:
         self._keys = [k for k in (keys or []) if k]
-        self._rr = RoundRobinKeyManager(self._keys)
+        # Shared with every other client on the same key list (one cursor per process)
+        self._rr = get_shared_key_manager(self._keys)
         self._model_name = model_name
+        # Passed to every GenerativeModel built per call (e.g. a JSON response_schema)
+        self._generation_config = generation_config
+        # One GenerativeModel per key, bound to that key's service client
+        self._models: Dict[str, Any] = {}
+        # Legacy path only: serializes configure()+call when per-key clients are unavailable
         self._cfg_lock = threading.Lock()
 
         if not self._keys:
             logger.warning("GeminiMultiKeyClient initialized with no API keys")
 
-    def _call_with_key(self, api_key: str, prompt: str):
-        """Configure SDK with a given key and make a single generate call.
+    def _model_for(self, api_key: str):
+        """Cached GenerativeModel for a key, or None when per-key clients are unavailable."""
+        model = self._models.get(api_key)
+        if model is None:
+            client = _service_client(api_key)
+            if client is None:
+                return None
+            import google.generativeai as genai
 
-        Note: We hold a lock across configure()+generate_content() to ensure
-        the global API key doesn't change underneath this call.
+            model = genai.GenerativeModel(self._model_name, generation_config=self._generation_config)
+            # The SDK only fills _client from the global configuration when it is unset
+            model._client = client
+            self._models[api_key] = model
+        return model
+
+    def _call_with_key(self, api_key: str, prompt: str, stream: bool = False, generation_config=None):
+        """Make a single generate call with a given key.
+
+        Uses the key's own model/client, so concurrent calls need no lock. In the
+        legacy fallback we hold a lock across configure()+generate_content() so
+        the global API key doesn't change underneath this call; with stream=True
+        the request (and its first chunk) is issued under the lock and the rest
+        is read later on the same, already-bound connection.
         """
+        model = self._model_for(api_key)
+        if model is not None:
+            return model.generate_content(prompt, stream=stream, generation_config=generation_config)
+
+        import google.generativeai as genai
+
+        with self._cfg_lock:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(self._model_name, generation_config=self._generation_config)
+            return model.generate_content(prompt, stream=stream, generation_config=generation_config)
+
+    def _embed_with_key(self, api_key: str, text: str, model: str) -> List[float]:
+        """Embed text under a given key (per-key client, else the configure() lock)."""
+        import google.generativeai as genai
+
+        client = _service_client(api_key)
+        if client is not None:
+            return genai.embed_content(
+                model=model, content=text, task_type="semantic_similarity", client=client
+            )["embedding"]
         with self._cfg_lock:
             genai.configure(api_key=api_key)
-            model = genai.GenerativeModel(self._model_name)
-            return model.generate_content(prompt)
+            return genai.embed_content(model=model, content=text, task_type="semantic_similarity")["embedding"]
 
     @staticmethod
     def _is_rate_limited(err: Exception) -> bool:
-        msg = str(err).lower()
-        return any(tok in msg for tok in [
-            'rate limit', 'quota', '429', 'resource exhausted', 'exceeded'
-        ])
+        code = getattr(err, 'code', None)
+        if isinstance(code, int):
+            # ResourceExhausted / TooManyRequests; any other status is not a rate limit
+            return code == 429
+        return _RATE_LIMIT_RE.search(str(err)) is not None
 
-    def generate(self, prompt: str):
-        """Generate model output using the next available API key.
+    @staticmethod
+    def _is_invalid_key(err: Exception) -> bool:
+        code = getattr(err, 'code', None)
+        if code == 401:
+            return True
+        return _INVALID_KEY_RE.search(str(err)) is not None
+
+    def _rotate(self, call: Callable[[str], T], label: str) -> T:
+        """Run `call(api_key)` on the next healthy key, failing over across keys.
 
-        Tries up to N times where N = number of keys. On rate limit-like
-        errors, rotates to the next key and retries. Other errors are raised.
+        Tries up to N times where N = number of keys. A rate-limited key is put
+        on cooldown and an invalid key is retired (both shared process-wide via
+        the key manager), then the next key is tried. If that leaves no key out
+        of cooldown, the retry waits a short jittered backoff first. Other
+        errors are raised.
         """
         if not self._keys:
             raise RuntimeError("No Gemini API keys configured")
 
         last_err: Optional[Exception] = None
-        for _ in range(len(self._keys)):
+        for attempt in range(len(self._keys)):
             api_key = self._rr.get_next()
+            if api_key is None:
+                break
             try:
-                return self._call_with_key(api_key, prompt)
+                result = call(api_key)
             except Exception as e:  # noqa: BLE001
                 last_err = e
                 if self._is_rate_limited(e):
-                    logger.info("Gemini rate limit on one key; rotating to next key and retrying")
+                    self._rr.mark_rate_limited(api_key)
+                    logger.info("Gemini rate limit on one key; cooling it down and rotating to next key")
+                    if attempt + 1 < len(self._keys) and not self._rr.has_healthy():
+                        time.sleep(random.uniform(0, min(_BACKOFF_BASE * 2 ** attempt, _BACKOFF_CAP)))
+                    continue
+                if self._is_invalid_key(e):
+                    self._rr.mark_invalid(api_key)
+                    logger.warning("Gemini rejected one API key as invalid; removing it from rotation")
                     continue
-                # Non-rate-limit errors should bubble up
+                # Other errors should bubble up
                 raise
+            self._rr.mark_ok(api_key)
+            return result
         # If all keys hit rate limits or failed similarly, raise the last error
         if last_err:
             raise last_err
-        raise RuntimeError("Gemini generate failed with unknown error")
+        raise RuntimeError(f"Gemini {label} failed: no usable API keys")
+
+    def generate(self, prompt: str, stream: bool = False, generation_config=None):
+        """Generate model output using the next available API key.
+
+        `generation_config`, if given, overrides the client's default for this call.
+        """
+        return self._rotate(
+            lambda key: self._call_with_key(key, prompt, stream=stream, generation_config=generation_config),
+            "generate",
+        )
+
+    def embed(self, text: str, model: str = 'models/text-embedding-004') -> List[float]:
+        """Return an embedding vector, rotating keys like generate()."""
+        return self._rotate(lambda key: self._embed_with_key(key, text, model), "embed")
 
     @staticmethod
     def extract_text(response) -> Optional[str]:
@@ -106,3 +222,103 @@ class GeminiMultiKeyClient:
         except Exception:  # noqa: BLE001
             return None
         return None
+
+
+class GeminiBase:
+    """Shared Gemini setup for services that call the model.
+
+    Sets `multi_client` (round-robin over GEMINI_API_KEYS) or, with a single
+    GEMINI_API_KEY, a plain `model`. Both stay None if initialization fails so
+    services can fall back instead of crashing the app.
+    """
+
+    model = None
+    multi_client: Optional[GeminiMultiKeyClient] = None
+
+    def _initialize_genai(self, model_name: str = 'gemini-2.5-flash', generation_config=None) -> None:
+        """Initialize Google Generative AI (multi-key if provided)."""
+        service = type(self).__name__
+        try:
+            import google.generativeai as genai
+
+            if settings.GEMINI_API_KEYS:
+                self.multi_client = GeminiMultiKeyClient(
+                    settings.GEMINI_API_KEYS, model_name, generation_config=generation_config
+                )
+                self.model = None
+                logger.info("%s using GeminiMultiKeyClient (round-robin keys)", service)
+            else:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+                self.model = genai.GenerativeModel(model_name, generation_config=generation_config)
+                self.multi_client = None
+                logger.info("%s Gemini AI initialized (single key)", service)
+        except Exception as e:  # noqa: BLE001
+            self.model = None
+            self.multi_client = None
+            logger.warning("%s Gemini AI initialization failed; using fallback. Error: %s", service, e)
+
+    @staticmethod
+    def _extract_text(response) -> Optional[str]:
+        return GeminiMultiKeyClient.extract_text(response)
+
+
+def read_stream(response, until: Optional[Callable[[str], bool]] = None) -> str:
+    """Concatenate the text of a streamed response.
+
+    If `until` is given it is checked against the accumulated text after each
+    chunk and reading stops as soon as it returns True, so trailing output the
+    caller does not need is never waited for.
+    """
+    parts: List[str] = []
+    for chunk in response:
+        text = GeminiMultiKeyClient.extract_text(chunk)
+        if not text:
+            continue
+        parts.append(text)
+        if until is not None and until(''.join(parts)):
+            break
+    return ''.join(parts)
+
+
+def json_object_end(text: str, start: int = 0) -> int:
+    """Index just past the first complete top-level JSON object at/after `start`.
+
+    Braces inside string literals are ignored. Returns -1 while the object is
+    still open (or none has started).
+    """
+    begin = text.find('{', start)
+    if begin < 0:
+        return -1
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(begin, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return -1
+
+
+def first_json_object(text: str) -> str:
+    """The first complete top-level JSON object in `text`, without surrounding prose.
+
+    Streams stop as soon as that object closes, so whatever follows it (a
+    closing fence, an end marker) may be missing or cut mid-token. Returns
+    `text` stripped when no complete object is found, so the parser reports it.
+    """
+    begin = text.find('{')
+    end = json_object_end(text, begin) if begin >= 0 else -1
+    return text[begin:end] if end >= 0 else text.strip()
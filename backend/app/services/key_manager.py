@@ -1,5 +1,11 @@
+import itertools
 import threading
-from typing import List, Optional
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+# Rate-limited keys sit out 2, 4, 8, ... seconds (per consecutive 429), capped here
+_MAX_COOLDOWN = 60.0
 
 
 class RoundRobinKeyManager:
@@ -9,17 +15,81 @@ class RoundRobinKeyManager:
         exactly once per logical cycle, then wrapping back to the start.
 
         Sequence for [A,B,C]: A, B, C, A, B, C, A, ...
+
+        Keys reported rate-limited are skipped until their cooldown expires,
+        and keys reported invalid are skipped for good, so callers do not
+        spend a round-trip on a key that is known to fail.
         """
 
         def __init__(self, keys: List[str]):
-                self._keys = keys[:] if keys else []
+                self._keys = tuple(keys or [])
+                # next() on itertools.count is a single atomic C call under the GIL
+                self._counter = itertools.count()
+                # Guards the health state below; selection only takes it while a key is unhealthy
                 self._lock = threading.Lock()
-                self._idx = 0
+                self._failures: Dict[str, int] = {}
+                self._cooldown_until: Dict[str, float] = {}
+                self._dead: Set[str] = set()
 
         def get_next(self) -> Optional[str]:
+                """Next healthy key; if every live key is cooling down, the one that recovers first.
+
+                Returns None when there are no keys or all of them are invalid.
+                """
                 if not self._keys:
                         return None
+                start = next(self._counter)
+                if not self._cooldown_until and not self._dead:
+                        # Common case, every key healthy: lock-free
+                        return self._keys[start % len(self._keys)]
+                with self._lock:
+                        now = time.monotonic()
+                        live = [k for k in self._keys if k not in self._dead]
+                        healthy = [k for k in live if self._cooldown_until.get(k, 0.0) <= now]
+                        if healthy:
+                                # Spread evenly over the healthy keys, still in rotation order
+                                return healthy[start % len(healthy)]
+                        if not live:
+                                return None
+                        return min(live, key=self._cooldown_until.__getitem__)
+
+        def has_healthy(self) -> bool:
+                """True if some live key is not cooling down."""
+                if not self._cooldown_until and not self._dead:
+                        return bool(self._keys)
+                with self._lock:
+                        now = time.monotonic()
+                        return any(
+                                k not in self._dead and self._cooldown_until.get(k, 0.0) <= now
+                                for k in self._keys
+                        )
+
+        def mark_ok(self, key: str) -> None:
+                if key in self._failures:
+                        with self._lock:
+                                self._failures.pop(key, None)
+                                self._cooldown_until.pop(key, None)
+
+        def mark_rate_limited(self, key: str) -> None:
                 with self._lock:
-                        key = self._keys[self._idx]
-                        self._idx = (self._idx + 1) % len(self._keys)
-                        return key
+                        failures = self._failures.get(key, 0) + 1
+                        self._failures[key] = failures
+                        self._cooldown_until[key] = time.monotonic() + min(_MAX_COOLDOWN, 2.0 ** failures)
+
+        def mark_invalid(self, key: str) -> None:
+                with self._lock:
+                        self._dead.add(key)
+
+
+@lru_cache(maxsize=None)
+def _shared_manager(keys: Tuple[str, ...]) -> RoundRobinKeyManager:
+        return RoundRobinKeyManager(list(keys))
+
+
+def get_shared_key_manager(keys: List[str]) -> RoundRobinKeyManager:
+        """Process-wide rotation for a given key list.
+
+        Every service built from the same GEMINI_API_KEYS shares one cursor, so
+        bursts spread across keys instead of each service starting at key 0.
+        """
+        return _shared_manager(tuple(keys or []))
@@ -0,0 +1,53 @@
+"""
+Optional shared Redis connection
+--------------------------------
+
+In-process caches are per worker and reset on restart. When REDIS_URL is set,
+services can also read/write a shared Redis so every worker (and the next
+deploy) benefits from work already done.
+
+Redis is strictly optional:
+- No REDIS_URL, or the `redis` package not installed -> get_redis() is None.
+- Short socket timeouts, so an unreachable Redis costs at most a fraction of
+  a second; callers treat any Redis error as a cache miss.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Keys from this app share one namespace on a possibly shared Redis
+KEY_PREFIX = "mindforge:"
+_SOCKET_TIMEOUT = 0.5  # seconds
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Optional[Any]:
+    """Return a process-wide redis.Redis client, or None when Redis is not configured.
+
+    The client connects lazily (on first command) and pools connections.
+    """
+    if not settings.REDIS_URL:
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed; shared cache disabled")
+        return None
+    try:
+        client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=_SOCKET_TIMEOUT,
+            socket_timeout=_SOCKET_TIMEOUT,
+        )
+    except Exception as e:  # noqa: BLE001
+        logger.warning("Invalid REDIS_URL; shared cache disabled. Error: %s", e)
+        return None
+    logger.info("Shared Redis cache enabled")
+    return client
@@ -0,0 +1,141 @@
+"""
+Retry helper for outbound provider calls
+----------------------------------------
+
+A single transient failure (429 / 5xx / dropped connection) used to send an
+evaluation straight to the static fallback. `with_retry` gives such calls a
+couple of quick, jittered retries inside a small time budget, and re-raises
+everything else (bad requests, auth errors, parse errors) immediately.
+
+`CircuitBreaker` complements it during an outage: after a run of transient
+failures, callers skip the provider for a cooldown instead of each paying
+the full retry budget before falling back.
+
+Synchronous on purpose: provider calls run on worker threads.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Optional, Tuple, Type, TypeVar
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_TRANSIENT_HTTP_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+@lru_cache(maxsize=1)
+def _transient_google_errors() -> Tuple[Type[BaseException], ...]:
+    # Imported on first use: google.api_core pulls in grpc, too slow for app import
+    from google.api_core import exceptions as gexc
+
+    return (
+        gexc.ResourceExhausted,
+        gexc.TooManyRequests,
+        gexc.ServiceUnavailable,
+        gexc.InternalServerError,
+        gexc.BadGateway,
+        gexc.GatewayTimeout,
+        gexc.DeadlineExceeded,
+    )
+
+
+def is_transient(err: BaseException) -> bool:
+    """True for rate limits, server-side errors and network hiccups."""
+    if isinstance(err, _transient_google_errors()):
+        return True
+    if isinstance(err, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(err, requests.HTTPError) and err.response is not None:
+        return err.response.status_code in _TRANSIENT_HTTP_STATUS
+    return False
+
+
+def with_retry(
+    fn: Callable[[], T],
+    *,
+    retries: int = 2,
+    base: float = 0.2,
+    cap: float = 1.5,
+    budget: float = 4.0,
+    retry_on: Callable[[BaseException], bool] = is_transient,
+    label: str = "call",
+) -> T:
+    """Call `fn()`, retrying transient failures with jittered exponential backoff.
+
+    Delay before retry i is min(cap, base * 2**i) plus up to 50% jitter. No retry
+    is attempted if it would start after `budget` seconds from the first call.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:  # noqa: BLE001
+            if attempt >= retries or not retry_on(e):
+                raise
+            delay = min(cap, base * (2 ** attempt))
+            delay += random.uniform(0, delay / 2)
+            if time.monotonic() - started + delay > budget:
+                raise
+            attempt += 1
+            logger.info("%s transient failure (%s); retry %d/%d in %.2fs", label, type(e).__name__, attempt, retries, delay)
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open).
+
+    After `threshold` consecutive recorded failures the breaker opens and
+    allow() returns False for `cooldown` seconds. Then a single trial call is
+    let through; its success closes the breaker, its failure re-opens it.
+    Callers must end every allowed call with record_success(), record_failure()
+    or release(), or the half-open breaker never lets another trial through.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0, label: str = "circuit") -> None:
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._label = label
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self._cooldown:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("%s closed", self._label)
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or (self._opened_at is None and self._failures >= self._threshold):
+                logger.warning("%s open for %.0fs after %d failures", self._label, self._cooldown, self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call that counts as neither success nor failure (e.g. a bad request)."""
+        with self._lock:
+            self._trial_in_flight = False
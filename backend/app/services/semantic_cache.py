@@ -0,0 +1,165 @@
+"""
+Semantic evaluation cache
+-------------------------
+
+Students often submit near-identical ideas during a session. Before running
+the full search + fetch + Gemini pipeline we embed the idea and compare it with
+recently evaluated ideas; if one is similar enough (cosine similarity above a
+threshold) its stored evaluation is reused.
+
+Design notes:
+- Exact repeats (after whitespace/case normalisation) are matched by hash first,
+  so they never cost an embedding call.
+- Vectors are L2-normalised on insert, so similarity is a plain dot product.
+  The store is bounded (oldest entries evicted) which keeps the linear scan
+  cheap without pulling in numpy/FAISS.
+- Entries expire after a TTL so stale market context is not served forever.
+- One cache per process (get_shared_semantic_cache) serves both the agent and
+  the AI service, and recent query vectors are remembered even on a miss, so
+  an idea that falls back from one to the other is embedded only once.
+- The cache is process-local and best-effort: any failure means "miss".
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Query vectors kept after a miss, so a repeat lookup/store of the same text
+# (e.g. the AI fallback right after the agent) skips the embedding call
+_RECENT_VECTORS = 256
+
+
+def _normalise_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _unit(vec: List[float]) -> Optional[Tuple[float, ...]]:
+    norm = math.sqrt(sum(v * v for v in vec))
+    if not norm:
+        return None
+    return tuple(v / norm for v in vec)
+
+
+class SemanticCache:
+    """Bounded, TTL-expiring nearest-neighbour cache of evaluation payloads."""
+
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        threshold: float = 0.92,
+        ttl_seconds: int = 6 * 3600,
+        max_entries: int = 1000,
+    ) -> None:
+        self._embed_fn = embed_fn
+        self._threshold = threshold
+        self._ttl = ttl_seconds
+        self._max = max_entries
+        # text hash -> (unit vector, payload, stored_at); insertion-ordered for eviction
+        self._entries: "OrderedDict[str, Tuple[Optional[Tuple[float, ...]], Dict[str, Any], float]]" = OrderedDict()
+        # text hash -> unit vector of recently embedded queries (LRU)
+        self._recent: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._threshold <= 1.0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(_normalise_text(text).encode("utf-8")).hexdigest()
+
+    def _embed(self, text: str, key: str) -> Optional[Tuple[float, ...]]:
+        with self._lock:
+            vec = self._recent.get(key)
+            if vec is not None:
+                self._recent.move_to_end(key)
+                return vec
+        try:
+            vec = _unit(self._embed_fn(_normalise_text(text)))
+        except Exception as e:  # noqa: BLE001
+            logger.debug("semantic_cache.embed fail error=%s", e)
+            return None
+        if vec is not None:
+            with self._lock:
+                self._recent[key] = vec
+                while len(self._recent) > _RECENT_VECTORS:
+                    self._recent.popitem(last=False)
+        return vec
+
+    def _purge_expired(self, now: float) -> None:
+        while self._entries:
+            key, (_, _, stored_at) = next(iter(self._entries.items()))
+            if now - stored_at < self._ttl:
+                break
+            del self._entries[key]
+
+    def lookup(self, text: str) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[float, ...]]]:
+        """Return (payload or None, query vector or None).
+
+        The vector is handed back so a following store() does not embed twice.
+        """
+        if not self.enabled:
+            return None, None
+        key = self._key(text)
+        now = time.time()
+        with self._lock:
+            self._purge_expired(now)
+            hit = self._entries.get(key)
+            if hit:
+                logger.debug("semantic_cache.hit exact")
+                return dict(hit[1]), hit[0]
+            snapshot = [(vec, payload) for vec, payload, _ in self._entries.values()]
+
+        vec = self._embed(text, key)
+        if vec is None:
+            return None, None
+        best_sim, best_payload = -1.0, None
+        for other, payload in snapshot:
+            if other is None:
+                continue
+            sim = sum(a * b for a, b in zip(vec, other))
+            if sim > best_sim:
+                best_sim, best_payload = sim, payload
+        if best_payload is not None and best_sim >= self._threshold:
+            logger.debug("semantic_cache.hit similarity=%.3f", best_sim)
+            return dict(best_payload), vec
+        return None, vec
+
+    def store(self, text: str, payload: Dict[str, Any], vec: Optional[Tuple[float, ...]] = None) -> None:
+        if not self.enabled:
+            return
+        key = self._key(text)
+        if vec is None:
+            vec = self._embed(text, key)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (vec, dict(payload), time.time())
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+
+
+_shared: Optional[SemanticCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_semantic_cache(
+    embed_fn: Callable[[str], List[float]], threshold: float, ttl_seconds: int
+) -> SemanticCache:
+    """Process-wide SemanticCache shared by every evaluation service.
+
+    Services embed with the same model and keys, so the first caller's
+    embed_fn (and settings) serve everyone.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SemanticCache(embed_fn, threshold=threshold, ttl_seconds=ttl_seconds)
+        return _shared
@@ -0,0 +1,54 @@
+"""
+Single-flight call coalescing
+-----------------------------
+
+When several threads ask for the same thing at the same moment (e.g. two
+evaluations on a similar topic searching the same query or fetching the same
+page), only the first caller does the work; the others wait for and share its
+result instead of issuing duplicate network requests.
+
+Only concurrent calls are coalesced; nothing is remembered once the leader
+finishes (pair with a cache for that).
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Thread-safe map of in-flight calls keyed by an arbitrary hashable key."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run fn() unless a call for `key` is already running; then share its outcome.
+
+        Results are shared as-is, so return immutable values (or copy them).
+        Exceptions raised by the leader are re-raised in every waiter.
+        """
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._calls[key] = fut
+        if not leader:
+            return fut.result()
+        try:
+            value = fn()
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
@@ -1,10 +1,12 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.routers.chat_router import router as chat_router
 from app.routers import health_router, ideas_router, leaderboard_router, users_router
+from app.services import get_agent_service
 from app.services.evaluation_queue import evaluation_queue
 
 # Configure logging
@@ -17,11 +19,17 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    logger.info(f"Starting {settings.API_TITLE} v{settings.API_VERSION}")
-    logger.info(f"Debug mode: {settings.DEBUG}")
-    logger.info(f"CORS origins: {settings.CORS_ORIGINS}")
+    logger.info("Starting %s v%s", settings.API_TITLE, settings.API_VERSION)
+    logger.info("Debug mode: %s", settings.DEBUG)
+    logger.info("CORS origins: %s", settings.CORS_ORIGINS)
+    # Provider reachability is stale-while-revalidate; startup never waits on the network
+    settings.refresh_provider_status()
     # Start background evaluation queue worker (lazy; safe if called even if unused)
     evaluation_queue.start()
+    # Services are built lazily; create the agent now only so its connection
+    # warmup (background thread) overlaps startup instead of the first submission
+    if settings.AGENT_WARMUP:
+        get_agent_service()
     yield
     # Shutdown
     # Gracefully stop queue worker
@@ -39,11 +47,14 @@ app = FastAPI(
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
     lifespan=lifespan,
+    # Encode every response with orjson instead of the stdlib json module
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
 cors_kwargs = {
-    "allow_origins": settings.CORS_ORIGINS,
+    # Starlette checks `origin in allow_origins` on every request; a frozenset makes that O(1)
+    "allow_origins": settings.CORS_ORIGINS_SET,
     "allow_credentials": True,
     "allow_methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     "allow_headers": ["*"],
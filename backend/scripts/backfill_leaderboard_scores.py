@@ -0,0 +1,22 @@
+"""One-time migration: give leaderboard entries without a score `score: 0`.
+
+The ranked leaderboard query (order_by('score')) leaves out documents that lack
+the field; every writer sets it now, so this only repairs older entries.
+
+Usage (from backend/, with the usual FIREBASE_* environment):
+    python -m scripts.backfill_leaderboard_scores
+"""
+
+import logging
+import sys
+
+from app.services import get_firebase_service
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    return 0 if get_firebase_service().backfill_missing_scores() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+import os
+
+# Skip the provider reachability probe when app.core.config is imported
+os.environ.setdefault("TESTING", "1")
@@ -0,0 +1,47 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import agent_service as agent_module
+from app.services.agent_service import AgentService
+
+
+class _Throttled(BaseHTTPRequestHandler):
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        self.send_response(429)
+        self.send_header("Retry-After", "30")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def cse_server(monkeypatch):
+    _Throttled.hits = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Throttled)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(agent_module, "_CSE_ENDPOINT", "http://127.0.0.1:%d/search" % server.server_port)
+    yield _Throttled
+    server.shutdown()
+
+
+def test_cse_429_backs_off_without_transport_retries(cse_server):
+    agent = AgentService()
+    agent.google_api_key, agent.google_cx = "key", "cx"
+
+    started = time.monotonic()
+    assert agent._cse_query("first", 5, ("first", 5)) == ()
+    # One request: the transport neither retried the 429 nor slept on Retry-After
+    assert cse_server.hits == 1
+    assert time.monotonic() - started < 5
+    # _cse_throttled honoured Retry-After: the next search is skipped without a request
+    assert agent._cse_backoff == 30
+    assert agent._cse_query("second", 5, ("second", 5)) == ()
+    assert cse_server.hits == 1
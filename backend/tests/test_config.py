@@ -0,0 +1,10 @@
+import os
+
+from app.core import config
+
+
+def test_loading_env_does_not_set_the_sentinel(monkeypatch):
+    monkeypatch.delenv("DOTENV_LOADED", raising=False)
+    config._load_env_once.cache_clear()
+    config._load_env_once()
+    assert "DOTENV_LOADED" not in os.environ
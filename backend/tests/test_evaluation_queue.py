@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.models.schemas import EvaluationResponse, IdeaSubmission
+from app.services import evaluation_queue as eq
+
+_RESULT = EvaluationResponse(
+    aiRelevance=80,
+    creativity=70,
+    impact=60,
+    clarity=90,
+    funFactor=50,
+    totalScore=70,
+    feedback="A focused idea with a clear user and a realistic first version to build.",
+)
+
+
+def _run_job(monkeypatch, recorded: bool, enabled: bool, calls=None) -> eq.EvalJob:
+    async def _evaluate(_submission):
+        return _RESULT
+
+    def _submit_atomic(*args, **kwargs):
+        if calls is not None:
+            calls.append(kwargs)
+        return recorded
+
+    firebase = SimpleNamespace(submit_atomic=_submit_atomic, enabled=enabled)
+    monkeypatch.setattr(eq, "get_agent_service", lambda: SimpleNamespace(evaluate_async=_evaluate))
+    monkeypatch.setattr(eq, "get_firebase_service", lambda: firebase)
+    monkeypatch.setattr(eq, "get_redis", lambda: None)
+
+    submission = IdeaSubmission(
+        uid="user-1",
+        name="Test User",
+        branch="CSE",
+        rollNumber="1RV23CS001",
+        idea="An app that matches surplus canteen food with students before closing time each day.",
+    )
+    job = eq.EvalJob(id="job-1", submission=submission)
+    asyncio.run(eq.EvaluationQueue()._process_job(job))
+    return job
+
+
+def test_failed_commit_marks_job_error(monkeypatch):
+    job = _run_job(monkeypatch, recorded=False, enabled=True)
+    assert job.status == "error"
+    assert job.result is None
+
+
+def test_recorded_submission_is_done(monkeypatch):
+    assert _run_job(monkeypatch, recorded=True, enabled=True).status == "done"
+
+
+def test_without_firebase_job_still_completes(monkeypatch):
+    assert _run_job(monkeypatch, recorded=False, enabled=False).status == "done"
+
+
+def test_idea_is_filed_under_the_current_round(monkeypatch):
+    monkeypatch.setattr(eq, "settings", SimpleNamespace(CURRENT_ROUND="3"))
+    calls = []
+    _run_job(monkeypatch, recorded=True, enabled=True, calls=calls)
+    assert calls[0]["idea"]["round"] == "3"
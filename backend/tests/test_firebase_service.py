@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+from app.services.firebase_service import FirebaseService
+
+
+class _Doc:
+    def __init__(self, store, uid):
+        self._store, self._uid = store, uid
+
+    def set(self, data):
+        self._store[self._uid] = data
+
+
+def _service(store):
+    service = FirebaseService.__new__(FirebaseService)
+    service._firebase_available = True
+    service._unavailable_until = 0.0
+    service._leaderboard = SimpleNamespace(document=lambda uid: _Doc(store, uid))
+    service._invalidate_leaderboard = lambda: None
+    return service
+
+
+def test_leaderboard_writes_always_carry_a_score():
+    store = {}
+    service = _service(store)
+    assert service.update_leaderboard("a", {"name": "A", "branch": "CSE"})
+    assert service.update_leaderboard("b", {"name": "B", "branch": "CSE", "score": None})
+    assert service.update_leaderboard("c", {"name": "C", "branch": "CSE", "score": 42})
+    assert store == {
+        "a": {"name": "A", "branch": "CSE", "score": 0},
+        "b": {"name": "B", "branch": "CSE", "score": 0},
+        "c": {"name": "C", "branch": "CSE", "score": 42},
+    }
+
+
+def test_backfill_sets_missing_scores_conditionally():
+    snaps = [
+        SimpleNamespace(reference="ref-a", update_time="t-a", to_dict=lambda: {}),
+        SimpleNamespace(reference="ref-b", update_time="t-b", to_dict=lambda: {"score": 7}),
+    ]
+    updates = []
+
+    class _Writer:
+        def on_write_error(self, callback):
+            pass
+
+        def update(self, ref, fields, option=None):
+            updates.append((ref, fields, option))
+
+        def close(self):
+            pass
+
+    service = _service({})
+    service._leaderboard = SimpleNamespace(select=lambda fields: SimpleNamespace(stream=lambda: iter(snaps)))
+    service._db = SimpleNamespace(bulk_writer=_Writer, write_option=lambda last_update_time: last_update_time)
+    assert service.backfill_missing_scores()
+    assert updates == [("ref-a", {"score": 0}, "t-a")]
@@ -0,0 +1,34 @@
+import pytest
+from google.api_core import exceptions as gexc
+
+from app.services.gemini_client import GeminiMultiKeyClient, _service_client
+
+
+@pytest.mark.parametrize(
+    "err",
+    [gexc.ResourceExhausted("Quota exceeded"), gexc.TooManyRequests("slow down"), RuntimeError("429 rate limit")],
+)
+def test_rate_limits_are_detected(err):
+    assert GeminiMultiKeyClient._is_rate_limited(err)
+
+
+@pytest.mark.parametrize(
+    "err",
+    [gexc.DeadlineExceeded("Deadline exceeded"), gexc.GatewayTimeout("deadline exceeded"), RuntimeError("Deadline exceeded")],
+)
+def test_deadline_exceeded_is_not_a_rate_limit(err):
+    assert not GeminiMultiKeyClient._is_rate_limited(err)
+
+
+def test_per_key_service_client_is_available():
+    # Relies on the SDK's private _ClientManager; None means every call fell back
+    # to the serialized configure() lock (check the google-generativeai pin)
+    assert _service_client("test-key-a") is not None
+    assert _service_client("test-key-a") is not _service_client("test-key-b")
+
+
+def test_models_are_bound_to_their_key_client():
+    client = GeminiMultiKeyClient(["test-key-a", "test-key-b"])
+    model = client._model_for("test-key-a")
+    assert model is not None
+    assert model._client is _service_client("test-key-a")
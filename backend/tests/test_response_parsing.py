@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import orjson
+
+from app.services.agent_service import AgentService
+from app.services.ai_service import AIService, _json_complete
+from app.services.gemini_client import read_stream
+
+_REPLY = orjson.dumps({
+    "aiRelevance": 80,
+    "creativity": 70,
+    "impact": 60,
+    "clarity": 90,
+    "funFactor": 50,
+    "feedback": "A focused idea with a clear user and a realistic first version to build.",
+}).decode()
+
+
+def _stream(text: str, cut: int):
+    """Chunks of `text`, the last one ending `cut` characters after the JSON closes."""
+    close = text.index(_REPLY) + len(_REPLY)
+    return [SimpleNamespace(text=text[:close - 5]), SimpleNamespace(text=text[close - 5:close + cut])]
+
+
+def _agent_parse(text: str, cut: int):
+    agent = AgentService.__new__(AgentService)
+    streamed = read_stream(_stream(text, cut), until=AgentService._stream_done)
+    return agent._parse_response(agent._extract_json_segment(streamed))
+
+
+def test_agent_fenced_reply_cut_before_closing_fence():
+    data = _agent_parse("JSON_RESPONSE:\n```json\n" + _REPLY + "\n```\nEND_JSON_RESPONSE", cut=1)
+    assert data["totalScore"] == 70
+
+
+def test_agent_reply_cut_inside_end_marker():
+    data = _agent_parse("JSON_RESPONSE:" + _REPLY + "END_JSON_RESPONSE", cut=3)
+    assert data["totalScore"] == 70
+
+
+def test_ai_service_reply_with_trailing_text():
+    service = AIService.__new__(AIService)
+    streamed = read_stream(_stream(_REPLY + "\n```", 2), until=_json_complete)
+    assert service._parse_ai_response(streamed)["totalScore"] == 70
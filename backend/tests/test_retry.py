@@ -0,0 +1,43 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.retry import CircuitBreaker
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(threshold=1, cooldown=0.01)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.02)
+    return breaker
+
+
+def test_half_open_trial_success_closes():
+    breaker = _open_breaker()
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_half_open_trial_released_lets_next_trial_through():
+    breaker = _open_breaker()
+    assert breaker.allow()
+    # e.g. the trial hit a non-transient error: neither success nor failure
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_generate_text_non_transient_error_ends_trial():
+    class _Client:
+        def generate(self, *args, **kwargs):
+            raise ValueError("response blocked")
+
+    svc = SimpleNamespace(_breaker=_open_breaker(), multi_client=_Client(), model=None)
+    with pytest.raises(ValueError):
+        AIService._generate_text(svc, "prompt")
+    assert svc._breaker.allow()
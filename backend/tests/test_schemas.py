@@ -0,0 +1,28 @@
+import pytest
+from pydantic import ValidationError
+
+from app.models.schemas import ModelScores
+
+_FEEDBACK = "A focused idea with a clear user and a realistic first version to build."
+
+
+def _scores(**overrides):
+    data = {"aiRelevance": 80, "creativity": 70, "impact": 60, "clarity": 90, "funFactor": 50, "feedback": _FEEDBACK}
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.parametrize("value", [None, "high", [], float("nan")])
+def test_non_numeric_score_is_a_validation_error(value):
+    with pytest.raises(ValidationError):
+        ModelScores.model_validate(_scores(aiRelevance=value))
+
+
+def test_null_score_in_json_is_a_validation_error():
+    with pytest.raises(ValidationError):
+        ModelScores.model_validate_json('{"aiRelevance": null}')
+
+
+@pytest.mark.parametrize("value, expected", [("85.5", 86), (99.6, 100), (84.4, 84), (150, 100), (-3, 0), ("70", 70)])
+def test_scores_are_rounded_and_clamped(value, expected):
+    assert ModelScores.model_validate(_scores(aiRelevance=value)).aiRelevance == expected
@@ -0,0 +1,26 @@
+from app.services import semantic_cache
+from app.services.semantic_cache import SemanticCache, get_shared_semantic_cache
+
+_PAYLOAD = {"totalScore": 70}
+
+
+def test_miss_then_store_embeds_once():
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [1.0, 0.0]
+
+    cache = SemanticCache(embed)
+    # e.g. the agent misses, then the AI fallback looks the same idea up and stores it
+    assert cache.lookup("Same idea") == (None, (1.0, 0.0))
+    assert cache.lookup("same  IDEA")[0] is None
+    cache.store("Same idea", _PAYLOAD)
+    assert len(calls) == 1
+
+
+def test_services_share_one_cache(monkeypatch):
+    monkeypatch.setattr(semantic_cache, "_shared", None)
+    first = get_shared_semantic_cache(lambda t: [1.0], threshold=0.9, ttl_seconds=60)
+    second = get_shared_semantic_cache(lambda t: [0.0], threshold=0.5, ttl_seconds=1)
+    assert first is second